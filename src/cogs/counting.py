@@ -1,6 +1,7 @@
 # ruff: noqa: F403 F405
 from discord.ext import commands
 from util.constants import *
+from util.outbound import scheduler
 from discord import *
 import random
 import time
@@ -40,13 +41,13 @@ class CountingCog(commands.Cog):
         
         if cooldown_key in self.user_cooldowns:
             if current_time - self.user_cooldowns[cooldown_key] < 3:
-                await message.delete()
+                scheduler.delete(message)
                 return
         
         try:
             number = int(eval(message.content.strip()))
         except:
-            await message.delete()
+            scheduler.delete(message)
             return
         
         self.user_cooldowns[cooldown_key] = current_time
@@ -67,29 +68,31 @@ class CountingCog(commands.Cog):
         expected_number = self.counting_channels[channel_id] + 1
 
         if self.last_user[channel_id] == message.author.id:
-            await message.delete(delay=0)
-            await webhook.delete()
+            scheduler.delete(message)
+            scheduler.delete_webhook(webhook)
             return
 
         if number == expected_number:
             self.counting_channels[channel_id] += 1
             self.last_user[channel_id] = message.author.id
         
-            await message.delete(delay=0)
-            message = await webhook.send(
+            scheduler.delete(message)
+            message = await scheduler.webhook_send(
+                webhook,
                 username=user_name,
                 avatar_url=user_avatar,
                 content=number,
                 wait=True
             )
-            await message.add_reaction("🎉")
+            scheduler.react(message, "🎉")
 
         else:
-            await webhook.send(
+            await scheduler.webhook_send(
+                webhook,
                 username=user_name,
                 avatar_url=user_avatar,
                 content=await random_fail_message()
             )
             self.counting_channels[channel_id] = 0
             
-        await webhook.delete()
\ No newline at end of file
+        scheduler.delete_webhook(webhook)
\ No newline at end of file
@@ -2,21 +2,38 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import yt_dlp
 import asyncio
 import random
 import concurrent.futures
+import weakref
 from typing import List, Optional, Tuple
 from util.constants import *
 from util.music.queue import *
+from util.music.queue_store import QueueStore, restore_queue, snapshot_queue
+from util.music.audio_cache import AudioCache
+from util.music.autoplay import AutoplayEngine
+from util.music.controls import ControlsMessage
+from util.music.charts import ChartService, FALLBACK_CHART_SONGS
+from util.music.extractor import ExtractionBackend
+from util.music.embeds import EmbedTemplates
+from util.music.guards import GuardRejected, MusicGuards, guarded, IN_VOICE, MUTED, PLAYING as GUARD_PLAYING, SAME_CHANNEL
+from util.music.history import PlayHistory
+from util.music.idle import IdleReaper
+from util.music.leaderboard import Leaderboard, WINDOWS
+from util.music.mixer import MixerSource, TrackedSource
+from util.music.mutes import MuteStore
+from util.music.now_playing import NowPlayingTicker, PROGRESS_FIELD, format_time, progress_bar
+from util.music.player import GuildPlayer, EMPTY, ENQUEUE, LOADING, PLAYING, RETRY, SKIP, STARTED, STOP, STOPPED
+from util.music.track import Track
+from util.music.track_cache import TrackCache, cache_key, extract_video_id
+from util.outbound import scheduler
 from modals.embeds import *
 from lang.texts import *
 from views.ticketviews import ActionsView
-import json
-import os
+import traceback
 from datetime import datetime, timedelta
-from ytmusicapi import YTMusic
-import re
+import time
+from urllib.parse import parse_qs, urlparse
 
 guild_queues = {}
 
@@ -26,62 +43,254 @@ def safe_avatar(user: discord.abc.User) -> Optional[str]:
     except Exception:
         return None
 
+def parse_timestamp(text: str) -> Optional[int]:
+    parts = text.strip().split(":")
+    if not 1 <= len(parts) <= 3 or not all(part.isdigit() for part in parts):
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+def stats_block(stats: dict) -> str:
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            value = ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in value.items())
+        elif isinstance(value, float):
+            value = f"{value:.2f}"
+        lines.append(f"{key}: {value}")
+    # Embed field values stop at 1024 characters
+    text = "\n".join(lines)[:1000]
+    return f"```\n{text}\n```"
+
+def is_playlist_url(url: str) -> bool:
+    if not url.startswith("http"):
+        return False
+    parsed = urlparse(url)
+    return "list" in parse_qs(parsed.query) or parsed.path.rstrip("/").endswith("/playlist")
+
 class AsyncSongLoader:
     def __init__(self, max_workers=4):
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.backend = ExtractionBackend(
+            mode=EXTRACTOR_MODE,
+            max_workers=EXTRACTOR_WORKERS,
+            max_in_flight=EXTRACTOR_MAX_IN_FLIGHT,
+            timeout=EXTRACTOR_TIMEOUT,
+            warm_options=(YT_OPTS,),
+        )
+        self.cache = TrackCache(
+            max_entries=TRACK_CACHE_MAX_ENTRIES,
+            max_bytes=TRACK_CACHE_MAX_BYTES,
+            metadata_ttl=TRACK_CACHE_METADATA_TTL,
+            stream_ttl=TRACK_CACHE_STREAM_TTL,
+            expiry_margin=TRACK_CACHE_EXPIRY_MARGIN,
+        )
+        self.audio_cache = AudioCache(
+            AUDIO_CACHE_DIR,
+            AUDIO_CACHE_MAX_BYTES,
+            min_plays=AUDIO_CACHE_MIN_PLAYS,
+        ) if AUDIO_CACHE_ENABLED else None
+        # normalized url/query -> future of the extraction already running for it
+        self.pending = {}
+        self.extractions = 0
+        self.coalesced = 0
+        # Sources whose Opus packets are copied instead of re-encoded
+        self.passthrough_sources = weakref.WeakSet()
+        # guild id -> playback counters for passthrough vs transcoded sources
+        self.playback_modes = {}
+
+    async def extract_info_async(self, url: str, loop=None, use_cache=True):
+        if use_cache:
+            cached = self.cache.get(url)
+            if cached:
+                return cached
+            # Only the stream ran out, resolve the video itself instead of repeating the search
+            source = self.cache.stream_source(url)
+            if source and source != url:
+                try:
+                    await self.extract_info_async(source, use_cache=False)
+                except Exception as e:
+                    print(f"Error refreshing stream for {url}: {e}")
+                refreshed = self.cache.peek(url)
+                if refreshed:
+                    return refreshed
+
+        key = cache_key(url) or url
+        future = self.pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.ensure_future(self._extract(url))
+            self.pending[key] = future
+            future.add_done_callback(lambda done: self._finish_pending(key, done))
+
+        # Shielded so one caller giving up doesn't cancel the others waiting on it
+        return await asyncio.shield(future)
+
+    async def _extract(self, url: str):
+        self.extractions += 1
+        info = await self.backend.extract(url, YT_OPTS)
+        self.cache.put(url, info)
+        return info
+
+    def _finish_pending(self, key, future):
+        if self.pending.get(key) is future:
+            del self.pending[key]
+        # Mark the error as seen in case every waiter was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> dict:
+        return {
+            "extractions": self.extractions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.pending),
+            "cache": self.cache.stats(),
+            "backend": self.backend.stats(),
+            "playback": {guild_id: dict(modes) for guild_id, modes in self.playback_modes.items()},
+        }
 
-    async def extract_info_async(self, url: str, loop=None):
+    async def extract_playlist_async(self, url: str, loop=None):
+        return await self.backend.extract(url, YT_PLAYLIST_OPTS)
+
+    def has_cached_audio(self, video_id: Optional[str]) -> bool:
+        return bool(self.audio_cache and video_id and video_id in self.audio_cache.entries)
+
+    async def preload_audio_source(
+        self,
+        stream_url: Optional[str],
+        loop=None,
+        video_id: Optional[str] = None,
+        codec: Optional[str] = None,
+        pcm: bool = False,
+        start: float = 0,
+    ):
         if loop is None:
             loop = asyncio.get_running_loop()
 
-        def run_yt():
-            with yt_dlp.YoutubeDL(YT_OPTS) as ydl:
-                return ydl.extract_info(url, download=False)
+        cached_path = self.audio_cache.lookup(video_id) if self.audio_cache and video_id else None
+        # Input seeking, FFmpeg jumps there before decoding anything
+        seek = f"-ss {start:.2f} " if start else ""
+        stream_options = seek + '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'
+
+        if pcm:
+            # Raw PCM for the crossfade mixer, passthrough doesn't apply
+            def create_pcm_source():
+                if cached_path:
+                    return discord.FFmpegPCMAudio(cached_path, before_options=seek or None, options='-vn')
+                return discord.FFmpegPCMAudio(
+                    stream_url,
+                    before_options=stream_options,
+                    options='-vn',
+                )
 
-        return await loop.run_in_executor(self.executor, run_yt)
+            return await loop.run_in_executor(self.executor, create_pcm_source)
 
-    async def preload_audio_source(self, stream_url: str, loop=None):
-        if loop is None:
-            loop = asyncio.get_running_loop()
+        if stream_url and not cached_path and OPUS_PASSTHROUGH and not codec and OPUS_PASSTHROUGH_PROBE:
+            # yt-dlp didn't say what the stream is, ask ffprobe before picking a mode
+            try:
+                codec, _bitrate = await discord.FFmpegOpusAudio.probe(stream_url)
+            except Exception as e:
+                print(f"Error probing audio codec: {e}")
+                codec = None
+
+        passthrough = bool(cached_path) or (OPUS_PASSTHROUGH and codec in ("opus", "libopus"))
 
         def create_source():
+            if cached_path:
+                # Local Ogg/Opus file, packets are copied straight through
+                return discord.FFmpegOpusAudio(cached_path, codec="opus", before_options=seek or None)
+
+            if passthrough:
+                # Already Opus (usually WebM itag 251), FFmpeg only remuxes it into Ogg
+                return discord.FFmpegOpusAudio(
+                    stream_url,
+                    codec="opus",
+                    before_options=stream_options,
+                    options='-vn',
+                )
+
             ffmpeg_args = {
-                'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
+                'before_options': stream_options,
                 'options': '-vn -bufsize 512k'
             }
             return discord.FFmpegOpusAudio(stream_url, **ffmpeg_args)
 
-        return await loop.run_in_executor(self.executor, create_source)
-
-song_loader = AsyncSongLoader()
-
-class OptimizedQueue:
-    def __init__(self):
-        self.queue: List[Tuple[discord.AudioSource, tuple]] = []
-        self.playing = False
-        self.lock = asyncio.Lock()
-
-    def add(self, song_data):
-        self.queue.append(song_data)
-
-    def get_next(self):
-        if self.queue:
-            return self.queue.pop(0)
-        return None
+        source = await loop.run_in_executor(self.executor, create_source)
+        if passthrough:
+            self.passthrough_sources.add(source)
+        return source
+
+    def count_playback(self, guild_id: int, source, duration: int):
+        modes = self.playback_modes.get(guild_id)
+        if modes is None:
+            modes = self.playback_modes[guild_id] = {
+                "passthrough": 0,
+                "transcoded": 0,
+                "encode_seconds_saved": 0,
+            }
 
-    def peek(self):
-        return self.queue[0] if self.queue else None
+        if source in self.passthrough_sources:
+            modes["passthrough"] += 1
+            # Every second of copied audio is a second FFmpeg didn't have to encode
+            modes["encode_seconds_saved"] += int(duration or 0)
+        else:
+            modes["transcoded"] += 1
 
-    def is_empty(self):
-        return len(self.queue) == 0
+    def passthrough_ratio(self, guild_id: int) -> float:
+        modes = self.playback_modes.get(guild_id)
+        if not modes:
+            return 0.0
+        played = modes["passthrough"] + modes["transcoded"]
+        return modes["passthrough"] / played if played else 0.0
 
-    def clear(self):
-        self.queue.clear()
+song_loader = AsyncSongLoader()
 
 class MusicCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.background_tasks = set()
+        # guild id -> long-lived player task driving that guild's playback
+        self.players = {}
+        # guild id -> crossfade mixer of the running voice client
+        self.mixers = {}
+        self.charts = ChartService(
+            song_loader.backend.extract,
+            CHART_CACHE_FILE,
+            refresh_interval=CHART_REFRESH_INTERVAL,
+        )
+        self.history = PlayHistory(PLAY_HISTORY_FILE)
+        self.leaderboard = Leaderboard()
+        self.autoplay = AutoplayEngine(
+            self.history,
+            related_ttl=AUTOPLAY_RELATED_TTL,
+            exclude_recent=AUTOPLAY_EXCLUDE_RECENT,
+            seed_pool=AUTOPLAY_SEED_POOL,
+        )
+        self.queue_store = QueueStore(
+            QUEUE_SNAPSHOT_FILE,
+            self.snapshot_queues,
+            self.any_playing,
+            debounce=QUEUE_SNAPSHOT_DEBOUNCE,
+            interval=QUEUE_SNAPSHOT_INTERVAL,
+            max_age=QUEUE_SNAPSHOT_MAX_AGE,
+        )
+        self.now_playing = NowPlayingTicker(NOW_PLAYING_INTERVAL, finished_footer=self.mark_finished)
+        self.idle_reaper = IdleReaper(IDLE_DISCONNECT_GRACE, self.disconnect_idle)
+        self.mutes = MuteStore(MUTE_FILE, debounce=MUTE_WRITE_DEBOUNCE)
+        self.embeds = EmbedTemplates()
+        self.guards = MusicGuards(self.mutes, self.embeds)
+        self.controls = ControlsMessage(
+            bot,
+            CONTROLS_MESSAGE_FILE,
+            I_CHANNEL,
+            self.build_controls_message,
+            debounce=CONTROLS_MESSAGE_DEBOUNCE,
+        )
+        # guild id -> queue saved before the last restart, restored the first time the guild needs it
+        self.saved_queues = self.queue_store.load()
 
     def make_embed(
         self,
@@ -109,246 +318,397 @@ class MusicCog(commands.Cog):
                 embed.add_field(name=name, value=value, inline=inline)
         return embed
 
+    def register_embeds(self):
+        # Replies that never change, built once and sent as the same object
+        embeds = self.embeds
+        embeds.register_constant(IN_VOICE, "Voice channel required", "Join a voice channel and try again.", color=0xe74c3c)
+        embeds.register_constant(SAME_CHANNEL, "Wrong voice channel", "You must be in the same voice channel as the bot.", color=0xe74c3c)
+        embeds.register_constant(GUARD_PLAYING, "Nothing playing", "Use /play to start music.", color=0xe74c3c)
+        embeds.register_constant("not_connected", "Not connected", "The bot is not connected to a voice channel.", color=0xe74c3c)
+        embeds.register_constant(
+            "queue_empty",
+            "Queue is empty",
+            "Use /play to add some music.",
+            color=0x95a5a6,
+            fields=[("Quick start", "```\n/play <song>\n/chart\n```", False)],
+        )
+        embeds.register_constant("shuffle_empty", "Queue is empty", "Nothing to shuffle.", color=0x95a5a6)
+        embeds.register_constant("command_error", "Error", "Something went wrong, try again.", color=0xe74c3c)
+        embeds.register_constant("nothing_new", "Nothing new to add", "All songs are already queued.", color=0x95a5a6)
+
     def create_background_task(self, coro):
         task = asyncio.create_task(coro)
         self.background_tasks.add(task)
         task.add_done_callback(self.background_tasks.discard)
         return task
 
+    def build_controls_message(self) -> Tuple[discord.Embed, discord.ui.View]:
+        actions_embed = self.make_embed(
+            title="Music Controls",
+            description="Use the commands below to control music.",
+            color=0x5865F2,
+            thumbnail=safe_avatar(self.bot.user),
+            footer=f"Serving {len(self.bot.users)} users",
+            footer_icon=safe_avatar(self.bot.user),
+            fields=[
+                ("Commands",
+                 "```\n/play <url|search>\n/queue\n/skip\n/pause\n/shuffle\n/stop\n/chart\n/clearqueue\n```",
+                 False),
+                ("Status",
+                 f"```\nServers: {len(self.bot.guilds)}\nUsers: {len(self.bot.users)}\n```",
+                 True)
+            ]
+        )
+        return actions_embed, ActionsView(bot=self.bot)
+
     async def send_static_message(self):
-        try:
-            actions_embed = self.make_embed(
-                title="Music Controls",
-                description="Use the commands below to control music.",
-                color=0x5865F2,
-                thumbnail=safe_avatar(self.bot.user),
-                footer=f"Serving {len(self.bot.users)} users",
-                footer_icon=safe_avatar(self.bot.user),
-                fields=[
-                    ("Commands",
-                     "```\n/play <url|search>\n/queue\n/skip\n/pause\n/shuffle\n/stop\n/chart\n/clearqueue\n```",
-                     False),
-                    ("Status",
-                     f"```\nServers: {len(self.bot.guilds)}\nUsers: {len(self.bot.users)}\n```",
-                     True)
-                ]
-            )
+        # Edits the stored controls message in place, bursts collapse into one update
+        self.controls.request()
 
-            channel = await self.bot.fetch_channel(I_CHANNEL)
-            if channel:
-                async for message in channel.history(limit=100):
-                    if (
-                        message.author == self.bot.user and
-                        message.embeds and
-                        message.embeds[0].title and
-                        "Music Controls" in message.embeds[0].title
-                    ):
-                        await message.delete()
-                        break
-
-                await channel.send(embed=actions_embed, view=ActionsView(bot=self.bot))
-        except Exception as e:
-            print(f"Error sending disconnect message: {e}")
+    def queue_for(self, guild_id: int, create: bool = True) -> Optional[OptimizedQueue]:
+        queue = guild_queues.get(guild_id)
+        if queue is not None:
+            return queue
+
+        saved = self.saved_queues.pop(guild_id, None)
+        if saved is not None:
+            queue = guild_queues[guild_id] = restore_queue(saved)
+        elif create:
+            queue = guild_queues[guild_id] = OptimizedQueue()
+        return queue
+
+    def snapshot_queues(self) -> dict:
+        # Guilds that weren't touched since the restart keep their old snapshot
+        guilds = dict(self.saved_queues)
+        for guild_id, queue in guild_queues.items():
+            player = self.players.get(guild_id)
+            position = player.position if player and player.active else None
+            saved = snapshot_queue(queue, position)
+            if saved:
+                guilds[guild_id] = saved
+            else:
+                guilds.pop(guild_id, None)
+        return guilds
+
+    def any_playing(self) -> bool:
+        return any(player.state == PLAYING for player in self.players.values())
+
+    def player_for(self, guild_id: int) -> GuildPlayer:
+        player = self.players.get(guild_id)
+        if player is None or player.state == STOPPED:
+            player = self.players[guild_id] = GuildPlayer(guild_id, self.start_next_track, self.resume_interrupted)
+        player.start()
+        return player
+
+    def notify_player(self, guild, event: str, interaction=None):
+        player = self.player_for(guild.id)
+        player.voice_client = guild.voice_client
+        if interaction is not None:
+            player.interaction = interaction
+        player.post(event)
+        self.queue_store.touch()
+
+    def stop_player(self, guild_id: int):
+        self.idle_reaper.cancel(guild_id)
+        self.mixers.pop(guild_id, None)
+        self.now_playing.finish(guild_id)
+        self.autoplay.forget(guild_id)
+        player = self.players.pop(guild_id, None)
+        if player:
+            player.post(STOP)
+        self.queue_store.touch()
+
+    async def start_next_track(self, player: GuildPlayer) -> str:
+        result = await self._start_next_track(player)
+        if result == EMPTY and self.players.get(player.guild_id) is player:
+            self.now_playing.finish(player.guild_id)
+        return result
+
+    async def _start_next_track(self, player: GuildPlayer) -> str:
+        guild = self.bot.get_guild(player.guild_id)
+        voice_client = guild.voice_client if guild else None
+        queue = guild_queues.get(player.guild_id)
+        if not queue or not voice_client or not voice_client.is_connected():
+            return EMPTY
+        if self.players.get(player.guild_id) is not player:
+            # Stopped and replaced, the guild's voice client belongs to the new player
+            return EMPTY
+
+        player.voice_client = voice_client
+        interaction = player.interaction
+        mixing = CROSSFADE_SECONDS > 0
+        next_track = queue.get_next()
+
+        if next_track:
+            start = queue.start_at.pop(next_track.entry_id, 0)
+            source = queue.take_prefetched(next_track)
+            if source is not None and start:
+                source.cleanup()
+                source = None
+            video_id = extract_video_id(next_track.url)
+            if source is None and next_track.resolved and song_loader.has_cached_audio(video_id):
+                try:
+                    source = await song_loader.preload_audio_source(None, video_id=video_id, pcm=mixing, start=start)
+                except Exception as e:
+                    print(f"Error opening cached audio for {video_id}: {e}")
+            if source is None:
+                try:
+                    webpage_url = next_track.url
 
-    async def play_next(self, guild, voice_client, interaction):
-        if guild.id not in guild_queues:
-            return
+                    fresh_info = await self.resolve_song(next_track)
 
-        queue = guild_queues[guild.id]
-        next_song_data = queue.get_next()
+                    if not fresh_info or "url" not in fresh_info:
+                        print(f"Failed to get fresh stream URL for {webpage_url}")
+                        return RETRY
 
-        if next_song_data:
-            try:
-                webpage_url = next_song_data['song_url']
-                
-                fresh_info = await song_loader.extract_info_async(webpage_url)
-                
-                if not fresh_info or "url" not in fresh_info:
-                    print(f"Failed to get fresh stream URL for {webpage_url}")
-                    queue.playing = False
-                    await self.play_next(guild, voice_client, interaction)
-                    return
-                
-                stream_url = fresh_info["url"]
-                
-                source = await song_loader.preload_audio_source(stream_url)
-                
-            except Exception as e:
-                print(f"Error creating audio source: {e}")
-                queue.playing = False
-                await self.play_next(guild, voice_client, interaction)
-                return
+                    stream_url = fresh_info["url"]
 
-            queue.playing = True
+                    source = await song_loader.preload_audio_source(
+                        stream_url,
+                        video_id=video_id,
+                        codec=fresh_info.get("acodec"),
+                        pcm=mixing,
+                        start=start,
+                    )
 
-            def after_song(e):
-                if e:
-                    print(f"Playback error: {e}")
-                queue.playing = False
-                pn = self.play_next(guild, voice_client, interaction)
-                asyncio.run_coroutine_threadsafe(pn, self.bot.loop)
+                except Exception as e:
+                    print(f"Error creating audio source: {e}")
+                    return RETRY
+
+            if (
+                self.players.get(player.guild_id) is not player
+                or player.state != LOADING
+                or not voice_client.is_connected()
+            ):
+                # Stopped, replaced or disconnected while the source was loading
+                source.cleanup()
+                return EMPTY
+
+            play_source = self.wrap_source(guild.id, queue, next_track, source, start)
 
             try:
-                voice_client.play(source, after=after_song)
+                voice_client.play(play_source, after=player.after_callback(self.bot.loop))
             except Exception as e:
                 print(f"Error starting playback: {e}")
-                queue.playing = False
-                return
+                play_source.cleanup()
+                return EMPTY
 
-            metadata = (
-                next_song_data['title'],
-                next_song_data['thumbnail'],
-                None,
-                next_song_data['duration'],
-                next_song_data['author'],
-                next_song_data['song_url'],
-                next_song_data['likes'],
-                next_song_data['views'],
-                next_song_data['upload_date']
-            )
-            
-            embed = self.create_now_playing_embed(metadata, interaction)
-            try:
-                msg = await interaction.channel.send(embed=embed)
-                self.create_background_task(
-                    self.update_progress(msg, embed, next_song_data['duration'])
-                )
-            except Exception as e:
-                print(f"Error sending now playing message: {e}")
+            self.source_playing(player, play_source)
+            await self.track_started(guild.id, queue, next_track, source, interaction)
+            return STARTED
         elif AUTO_PLAY_ENABLED:
-            print("autoplaying")
-            song_link = None
+            seed_video_id = extract_video_id(queue.current.url) if queue.current else None
+            if not seed_video_id:
+                try:
+                    seed_video_id = await self.history.last_played(guild.id)
+                except Exception as e:
+                    print(f"Error reading play history for autoplay seed: {e}")
 
-            channel = getattr(interaction, "channel", None) or await self.bot.fetch_channel(I_CHANNEL)
+            suggestion = None
             try:
-                async for msg in channel.history(limit=200):
-                    if not msg.embeds:
-                        continue
-                    for emb in msg.embeds:
-                        candidates = []
-                        if getattr(emb, "url", None):
-                            candidates.append(emb.url)
-                        if getattr(emb, "title", None):
-                            candidates.append(emb.title)
-                        if getattr(emb, "description", None):
-                            candidates.append(emb.description)
-                        if getattr(emb, "fields", None):
-                            for f in emb.fields:
-                                candidates.append(f.name)
-                                candidates.append(f.value)
-
-                        url_re = re.compile(r"(https?://(?:music\.youtube\.com|(?:www\.)?youtube\.com|youtu\.be)[^\s]+)", re.IGNORECASE)
-                        for text in candidates:
-                            if not text:
-                                continue
-                            m = url_re.search(text)
-                            if m:
-                                song_link = m.group(1)
-                                break
-                        if song_link:
-                            break
-                    if song_link:
-                        break
+                suggestion = await self.autoplay.next_for(guild.id, seed_video_id)
             except Exception as e:
-                print(f"Error scanning history for embed song link: {e}")
-            
-            try: 
-                fresh_info = await song_loader.extract_info_async(song_link)
-                if not fresh_info or "url" not in fresh_info:
-                    print(f"Failed to get fresh stream URL for autoplay {song_link}")
-                    queue.playing = False
-                    return
+                print(f"Autoplay error: {e}")
 
-                stream_url = fresh_info["url"]
-                source = await song_loader.preload_audio_source(stream_url)
-            except Exception as e:
-                print(f"Error creating audio source for autoplay: {e}")
-                queue.playing = False
-                return
-            
-            try:
-                print("suggestions")
-                yt = YTMusic()
-                video_id_match = re.search(r"(?:v=|youtu\.be/)([\w-]{11})", song_link)
-                if not video_id_match:
-                    print(f"Could not extract video ID from link: {song_link}")
-                    return
+            if not suggestion or self.players.get(player.guild_id) is not player:
+                print("queue stopped")
+                return EMPTY
 
-                video_id = video_id_match.group(1)
-                related_songs = yt.get_song_related(video_id)
+            video_id, title = suggestion
+            queue.add(Track.placeholder({"id": video_id, "title": title}))
+            return RETRY
 
-                suggestion = related_songs[0]["videoid"]
+        else:
+            print("queue stopped")
+            return EMPTY
+
+    def wrap_source(self, guild_id: int, queue, track: Track, source, offset: float = 0):
+        if CROSSFADE_SECONDS > 0:
+            # One mixer per voice session, later tracks are handed to it by the prefetcher
+            mixer = MixerSource(
+                CROSSFADE_SECONDS,
+                self.mixer_switch_callback(guild_id),
+                lambda: queue.version,
+            )
+            mixer.start(track, source, offset)
+            return mixer
+        return TrackedSource(source, offset)
+
+    def source_playing(self, player: GuildPlayer, play_source):
+        player.source = play_source
+        if isinstance(play_source, MixerSource):
+            self.mixers[player.guild_id] = play_source
+        else:
+            self.mixers.pop(player.guild_id, None)
+
+    async def open_at(self, track: Track, position: float, pcm: bool = False):
+        video_id = extract_video_id(track.url)
+        # The stream url from the last resolve is reused as long as it hasn't expired
+        info = song_loader.cache.peek(track.url)
+        if info and "entries" in info:
+            info = next((e for e in info["entries"] if e), None)
+        if not (info and "url" in info) and not song_loader.has_cached_audio(video_id):
+            info = await self.resolve_song(track)
+            if not info or "url" not in info:
+                return None
 
-                try:
-                    webpage_url = f"https://www.youtube.com/watch?v={suggestion}"
-                    
-                    fresh_info = await song_loader.extract_info_async(webpage_url)
-                    
-                    if not fresh_info or "url" not in fresh_info:
-                        print(f"Failed to get fresh stream URL for {webpage_url}")
-                        queue.playing = False
-                        await self.play_next(guild, voice_client, interaction)
-                        return
-                    
-                    stream_url = fresh_info["url"]
-                    
-                    source = await song_loader.preload_audio_source(stream_url)
-                    
-                except Exception as e:
-                    print(f"Error creating audio source: {e}")
-                    queue.playing = False
-                    await self.play_next(guild, voice_client, interaction)
-                    return
-                
-                queue.playing = True
+        return await song_loader.preload_audio_source(
+            info.get("url") if info else None,
+            video_id=video_id,
+            codec=info.get("acodec") if info else None,
+            pcm=pcm,
+            start=position,
+        )
 
-                def after_song(e):
-                    if e:
-                        print(f"Playback error: {e}")
-                    queue.playing = False
-                    pn = self.play_next(guild, voice_client, interaction)
-                    asyncio.run_coroutine_threadsafe(pn, self.bot.loop)
+    async def resume_interrupted(self, player: GuildPlayer) -> bool:
+        queue = guild_queues.get(player.guild_id)
+        track = queue.current if queue else None
+        voice_client = player.voice_client
+        if not track or not voice_client or not voice_client.is_connected():
+            return False
 
-                try:
-                    voice_client.play(source, after=after_song)
-                except Exception as e:
-                    print(f"Error starting playback: {e}")
-                    queue.playing = False
-                    return
+        position = player.position
+        if (
+            player.resume_attempts >= RESUME_MAX_ATTEMPTS
+            or not track.duration
+            or position >= track.duration - RESUME_END_SLACK
+        ):
+            return False
 
-                metadata = (
-                    next_song_data['title'],
-                    next_song_data['thumbnail'],
-                    None,
-                    next_song_data['duration'],
-                    next_song_data['author'],
-                    next_song_data['song_url'],
-                    next_song_data['likes'],
-                    next_song_data['views'],
-                    next_song_data['upload_date']
-                )
-                
-                embed = self.create_now_playing_embed(metadata, interaction)
-                try:
-                    msg = await interaction.channel.send(embed=embed)
-                    self.create_background_task(
-                        self.update_progress(msg, embed, next_song_data['duration'])
-                    )
-                except Exception as e:
-                    print(f"Error sending now playing message: {e}")
+        print(f"Playback stopped early at {format_time(position)} in guild {player.guild_id}, resuming")
+        try:
+            source = await self.open_at(track, position, pcm=CROSSFADE_SECONDS > 0)
+        except Exception as e:
+            print(f"Error resuming playback: {e}")
+            return False
+        if source is None:
+            return False
+
+        play_source = self.wrap_source(player.guild_id, queue, track, source, position)
+        try:
+            voice_client.play(play_source, after=player.after_callback(self.bot.loop))
+        except Exception as e:
+            print(f"Error resuming playback: {e}")
+            play_source.cleanup()
+            return False
+
+        self.source_playing(player, play_source)
+        # The old prefetch counted from before the interruption and may hold the replaced mixer
+        self.schedule_prefetch(queue, track.duration, self.mixers.get(player.guild_id), position)
+        return True
+
+    async def track_started(self, guild_id: int, queue, track: Track, source, interaction):
+        queue.current = track
+        self.queue_store.touch()
+        song_loader.count_playback(guild_id, source, track.duration)
+        self.autoplay.started(guild_id)
+        player = self.players.get(guild_id)
+        # Tracks resumed from a saved offset are already part way through
+        self.schedule_prefetch(queue, track.duration, self.mixers.get(guild_id), player.position if player else 0)
+        self.record_play(guild_id, track)
+        if AUTO_PLAY_ENABLED and queue.is_empty():
+            self.schedule_autoplay(guild_id, track)
+
+        if interaction is not None and player is not None:
+            embed = self.create_now_playing_embed(track, interaction, player.position)
+            try:
+                msg = await scheduler.send(interaction.channel, embed=embed)
+                self.now_playing.start(guild_id, msg, embed, track.duration, lambda: player.position)
             except Exception as e:
-                print(f"Autoplay error: {e}")
+                print(f"Error sending now playing message: {e}")
 
-        else:
-            print("queue stopped")
-            queue.playing = False
+    def mixer_switch_callback(self, guild_id: int):
+        loop = self.bot.loop
+
+        # Called on the voice thread when the mixer moves on to the track it was offered
+        def on_switch(track):
+            loop.call_soon_threadsafe(self.create_background_task, self.mixer_switched(guild_id, track))
+
+        return on_switch
+
+    async def mixer_switched(self, guild_id: int, track: Track):
+        queue = guild_queues.get(guild_id)
+        if not queue:
+            return
+        if queue.peek() is track:
+            queue.get_next()
+        player = self.players.get(guild_id)
+        await self.track_started(guild_id, queue, track, None, player.interaction if player else None)
+
+    def record_play(self, guild_id: int, track: Track):
+        video_id = extract_video_id(track.url)
+        if video_id:
+            self.leaderboard.record(guild_id, track.requester, video_id, track.title)
+            self.maybe_cache_audio(guild_id, video_id, track)
+            self.create_background_task(
+                self.history.record(guild_id, track.requester, video_id, track.title)
+            )
+
+    def maybe_cache_audio(self, guild_id: int, video_id: str, track: Track):
+        audio_cache = song_loader.audio_cache
+        if not audio_cache or not audio_cache.wants(video_id, self.leaderboard.plays(guild_id, video_id)):
+            return
+
+        info = song_loader.cache.peek(track.url)
+        if info and "url" in info:
+            self.create_background_task(
+                audio_cache.store(video_id, info["url"], is_opus=info.get("acodec") == "opus")
+            )
+
+    def schedule_autoplay(self, guild_id: int, track: Track):
+        video_id = extract_video_id(track.url)
+        if video_id:
+            self.create_background_task(
+                self.autoplay.prepare(guild_id, video_id, song_loader.extract_info_async)
+            )
 
-    def create_now_playing_embed(self, metadata, interaction):
-        title, thumbnail, _, duration, author, song_url, likes, views, upload_date = metadata
+    def schedule_prefetch(self, queue, duration, mixer: Optional[MixerSource] = None, position: float = 0):
+        queue.cancel_prefetch_task()
+        queue.prefetch_task = self.create_background_task(
+            self.prefetch_upcoming(queue, queue.version, duration, mixer, position)
+        )
+
+    async def prefetch_upcoming(self, queue, version, duration, mixer: Optional[MixerSource] = None, position: float = 0):
+        try:
+            await asyncio.sleep(max(0, int(duration or 0) - position - PREFETCH_LEAD_SECONDS))
+
+            head = queue.peek()
+            if not head or version != queue.version:
+                return
+
+            info = await self.resolve_song(head, queue)
+            if info and "url" in info and version == queue.version and queue.peek() is head:
+                source = await song_loader.preload_audio_source(
+                    info["url"],
+                    video_id=extract_video_id(head.url),
+                    codec=info.get("acodec"),
+                    pcm=mixer is not None,
+                )
+                if version != queue.version or queue.peek() is not head:
+                    source.cleanup()
+                elif mixer is not None:
+                    # The mixer fades into it and pops it from the queue once it switches
+                    if not mixer.offer(version, head, source):
+                        source.cleanup()
+                elif not queue.prefetched:
+                    queue.prefetched = (version, head, source)
+                else:
+                    source.cleanup()
+
+            # Only warm the track cache for the rest, a spawned FFmpeg per item is too much
+            upcoming = queue.page(1, PREFETCH_DEPTH - 1)
+            if upcoming and version == queue.version:
+                await asyncio.gather(
+                    *(self.resolve_song(song, queue) for song in upcoming),
+                    return_exceptions=True
+                )
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Error prefetching next song: {e}")
 
-        def format_time(seconds):
-            m, s = divmod(int(seconds), 60)
-            return f"{m:02}:{s:02}"
+    def create_now_playing_embed(self, track: Track, interaction, position: float = 0):
+        title, thumbnail, duration, author, song_url = track.title, track.thumbnail, track.duration, track.author, track.url
 
         fields = [
             ("Artist", f"{author}", True),
@@ -367,48 +727,58 @@ class MusicCog(commands.Cog):
             footer_icon=safe_avatar(self.bot.user),
             fields=[(n, f"```\n{v}\n```", True) for n, v, _ in fields]
         )
+        embed.add_field(name=PROGRESS_FIELD, value=progress_bar(position, duration), inline=False)
         return embed
 
-    async def update_progress(self, message, embed, duration):
-        try:
-            await asyncio.sleep(max(0, int(duration)))
-            embed.color = 0x95a5a6
-            embed.set_footer(text="Playback finished", icon_url=safe_avatar(self.bot.user))
-            await message.edit(embed=embed)
-        except (discord.HTTPException, asyncio.CancelledError):
-            pass
+    def mark_finished(self, embed: discord.Embed):
+        embed.set_footer(text="Playback finished", icon_url=safe_avatar(self.bot.user))
 
-    def format_time(self, seconds):
-        m, s = divmod(int(seconds), 60)
-        return f"{m:02}:{s:02}"
-
-    async def process_single_entry(self, entry: dict):
+    async def process_single_entry(self, entry: dict, requester: Optional[int] = None):
         try:
             if not entry or "url" not in entry:
                 print(f"Error processing entry: Missing 'url' key")
                 return None
 
-            return {
-                'entry_data': entry,
-                'title': entry.get("title", "Unknown title"),
-                'thumbnail': entry.get("thumbnail"),
-                'duration': entry.get("duration", 0),
-                'author': entry.get("uploader", "Unknown author"),
-                'song_url': entry.get("webpage_url", "Unknown URL"),
-                'likes': entry.get("like_count", 0),
-                'views': entry.get("view_count", 0),
-                'upload_date': entry.get("upload_date", "Unknown date")
-            }
+            return Track.from_info(entry, requester)
 
         except Exception as e:
             print(f"Error processing entry: {e}")
             return None
 
-    async def process_song_entries(self, entries: List[dict], guild_id: int):
-        if guild_id not in guild_queues:
-            guild_queues[guild_id] = OptimizedQueue()
-
-        queue = guild_queues[guild_id]
+    async def resolve_song(self, track: Track, queue: Optional[OptimizedQueue] = None):
+        info = await song_loader.extract_info_async(track.url)
+        if info and "entries" in info:
+            info = next((e for e in info["entries"] if e), None)
+
+        # Placeholders from a flat playlist only know title and duration
+        if info and not track.resolved:
+            fields = track.resolved_fields(info)
+            if queue:
+                queue.update(track, fields)
+            else:
+                track.apply(fields)
+        return info
+
+    async def enqueue_placeholders(
+        self,
+        entries: List[dict],
+        guild_id: int,
+        requester: Optional[int] = None,
+        lane: str = LANE_NORMAL,
+    ):
+        queue = self.queue_for(guild_id)
+        placeholders = [Track.placeholder(entry, requester) for entry in entries]
+        return await queue.add_many(placeholders, lane=lane, dedupe=QUEUE_DEDUPE_PLAYLISTS)
+
+    async def process_song_entries(
+        self,
+        entries: List[dict],
+        guild_id: int,
+        requester: Optional[int] = None,
+        lane: str = LANE_NORMAL,
+        dedupe: bool = False,
+    ):
+        queue = self.queue_for(guild_id)
         processed_songs = []
 
         batch_size = 5
@@ -418,7 +788,7 @@ class MusicCog(commands.Cog):
             tasks = []
             for entry in batch:
                 if entry:
-                    tasks.append(self.process_single_entry(entry))
+                    tasks.append(self.process_single_entry(entry, requester))
 
             if tasks:
                 results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -426,142 +796,33 @@ class MusicCog(commands.Cog):
                     if isinstance(result, Exception) or not result:
                         continue
                     processed_songs.append(result)
-                    queue.add(result)
 
-        return processed_songs
+        return await queue.add_many(processed_songs, lane=lane, dedupe=dedupe)
 
     @app_commands.command(name="chart", description="Plays a random song from the YouTube Music charts")
+    @guarded(MUTED, IN_VOICE, SAME_CHANNEL)
     async def play_chart(self, interaction: discord.Interaction):
-        if await self.check_timeout_decorator(interaction):
-            return
-        else:
-            await interaction.response.defer()
-
-        loading_embed = self.make_embed(
-            title="Loading chart",
-            description="Fetching popular songs...",
-            color=0x3498db,
-        )
-
-        loading_message = await interaction.followup.send(embed=loading_embed)
-
-        try:
-            chart_urls = [
-                "https://music.youtube.com/playlist?list=RDCLAK5uy_kmPRjHDECIcuVwnKsx5w4UBCp9jSEMzM",
-                "https://music.youtube.com/playlist?list=RDCLAK5uy_k8jhb5wP3rUqLOWFzVQNE_YdIcF7O4BN",
-                "https://www.youtube.com/playlist?list=PLFgquLnL59alCl_2TQvOiD5Vgm1hCaGSI",
-            ]
-
-            playlist_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': True,
-                'playlist_items': '1-20',
-            }
-
-            trending_songs = []
-
-            for chart_url in chart_urls:
-                try:
-                    def extract_playlist_info():
-                        with yt_dlp.YoutubeDL(playlist_opts) as ydl:
-                            return ydl.extract_info(chart_url, download=False)
-
-                    chart_info = await asyncio.get_running_loop().run_in_executor(
-                        song_loader.executor, extract_playlist_info
-                    )
-
-                    if "entries" in chart_info and chart_info["entries"]:
-                        for entry in chart_info["entries"][:15]:
-                            if entry and entry.get("title"):
-                                title = entry["title"]
-                                uploader = entry.get("uploader", "")
-                                if uploader and uploader.lower() not in title.lower():
-                                    song_query = f"{title} {uploader}"
-                                else:
-                                    song_query = title
-                                trending_songs.append(song_query)
-
-                        if trending_songs:
-                            break
-
-                except Exception as e:
-                    print(f"Fehler beim Laden der Playlist {chart_url}: {e}")
-                    continue
-
-            if not trending_songs:
-                try:
-                    search_queries = [
-                        "ytsearch5:music charts 2024",
-                        "ytsearch5:trending music now",
-                        "ytsearch5:top songs 2024"
-                    ]
-
-                    for search_query in search_queries:
-                        try:
-                            search_results = await song_loader.extract_info_async(search_query)
-                            if "entries" in search_results:
-                                for entry in search_results["entries"][:5]:
-                                    if entry and entry.get("title"):
-                                        title = entry["title"]
-                                        uploader = entry.get("uploader", "")
-                                        if uploader and uploader.lower() not in title.lower():
-                                            song_query = f"{title} {uploader}"
-                                        else:
-                                            song_query = title
-                                        trending_songs.append(song_query)
-
-                                if trending_songs:
-                                    break
-                        except Exception as e:
-                            print(f"Fehler bei der Suche {search_query}: {e}")
-                            continue
-
-                except Exception as e:
-                    print(f"Fehler bei der Fallback-Suche: {e}")
-
-            if not trending_songs:
-                trending_songs = [
-                    "Flowers Miley Cyrus",
-                    "As It Was Harry Styles",
-                    "Bad Habit Steve Lacy",
-                    "About Damn Time Lizzo",
-                    "Heat Waves Glass Animals",
-                    "Stay The Kid LAROI Justin Bieber",
-                    "Ghost Justin Bieber",
-                    "Industry Baby Lil Nas X",
-                    "Good 4 U Olivia Rodrigo",
-                    "Levitating Dua Lipa"
-                ]
-
-            random_chart_song = random.choice(trending_songs)
+        await interaction.response.defer()
 
+        chart_song = self.charts.pick()
+        if chart_song:
+            selected = f"{chart_song['title']} {chart_song['author']}".strip()
+            search_query = chart_song['url']
             loading_embed = self.make_embed(
                 title="Loading chart",
-                description=f"Selected: {random_chart_song}\nPreparing...",
+                description=f"Selected: {selected}\nPreparing...",
                 color=0x3498db,
             )
-            await loading_message.edit(embed=loading_embed)
-
-        except Exception as e:
-            print(f"Fehler beim Abrufen der Charts: {e}")
-            fallback_songs = [
-                "Flowers Miley Cyrus",
-                "As It Was Harry Styles",
-                "Bad Habit Steve Lacy",
-                "About Damn Time Lizzo",
-                "Heat Waves Glass Animals"
-            ]
-            random_chart_song = random.choice(fallback_songs)
-
+        else:
+            random_chart_song = random.choice(FALLBACK_CHART_SONGS)
+            search_query = f"ytsearch:{random_chart_song}"
             loading_embed = self.make_embed(
                 title="Loading chart (fallback)",
                 description=f"Selected: {random_chart_song}\nPreparing...",
                 color=0xe67e22,
             )
-            await loading_message.edit(embed=loading_embed)
 
-        search_query = f"ytsearch:{random_chart_song}"
+        loading_message = await interaction.followup.send(embed=loading_embed)
 
         try:
             info = await song_loader.extract_info_async(search_query)
@@ -574,18 +835,15 @@ class MusicCog(commands.Cog):
             await interaction.followup.send(embed=error_embed, ephemeral=True)
             return
 
-        if interaction.guild.id not in guild_queues:
-            guild_queues[interaction.guild.id] = OptimizedQueue()
-
-        queue = guild_queues[interaction.guild.id]
+        queue = self.queue_for(interaction.guild.id)
 
         entry = info["entries"][0] if "entries" in info and info["entries"] else info
 
-        processed_song = await self.process_single_entry(entry)
+        processed_song = await self.process_single_entry(entry, interaction.user.id)
         if processed_song:
             queue.add(processed_song)
-            title = processed_song['title']
-            thumbnail = processed_song['thumbnail']
+            title = processed_song.title
+            thumbnail = processed_song.thumbnail
 
             success_embed = self.make_embed(
                 title="Added to queue",
@@ -597,24 +855,13 @@ class MusicCog(commands.Cog):
                 ]
             )
 
-            await interaction.channel.send(embed=success_embed)
+            await scheduler.send(interaction.channel, embed=success_embed)
 
         try:
-            await loading_message.delete()
+            await scheduler.delete(loading_message)
         except Exception:
             pass
 
-        if not interaction.user.voice:
-            await interaction.followup.send(
-                embed=self.make_embed(
-                    title="Voice channel required",
-                    description="Join a voice channel and try again.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
         voice_client = interaction.guild.voice_client
         if not voice_client or not voice_client.is_connected():
             channel = interaction.user.voice.channel
@@ -623,30 +870,20 @@ class MusicCog(commands.Cog):
             voice_channel = voice_client.channel
 
             if SET_VC_STATUS_TO_MUSIC_PLAYING:
-                current_song = (queue.peek()['title'] if queue.peek() else "Music")
+                current_song = (queue.peek().title if queue.peek() else "Music")
                 try:
                     await voice_channel.edit(status=f"Listening to: {current_song}")
                 except Exception:
                     pass
 
-        if voice_client and voice_client.channel and interaction.user.voice.channel != voice_client.channel:
-            await interaction.followup.send(
-                embed=self.make_embed(
-                    title="Wrong voice channel",
-                    description="You must be in the same voice channel as the bot.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-        else:
-            if not queue.playing and not voice_client.is_playing() and not queue.is_empty():
-                await self.play_next(guild=interaction.guild, voice_client=voice_client, interaction=interaction)
+        if not queue.is_empty():
+            self.notify_player(interaction.guild, ENQUEUE, interaction)
 
     async def insipre_me(self, interaction: discord.Interaction):
-        if await self.check_timeout_decorator(interaction):
+        # Buttons skip the app command checks, run the same guards as /chart
+        if await self.guards.reject(interaction, (MUTED, IN_VOICE, SAME_CHANNEL)):
             return
-        else:
-            await interaction.response.defer()
+        await interaction.response.defer()
 
         random_songs = [
             "Never Gonna Give You Up Rick Astley",
@@ -731,18 +968,15 @@ class MusicCog(commands.Cog):
             )
             return
 
-        if interaction.guild.id not in guild_queues:
-            guild_queues[interaction.guild.id] = OptimizedQueue()
-
-        queue = guild_queues[interaction.guild.id]
+        queue = self.queue_for(interaction.guild.id)
 
         entry = info["entries"][0] if "entries" in info and info["entries"] else info
 
-        processed_song = await self.process_single_entry(entry)
+        processed_song = await self.process_single_entry(entry, interaction.user.id)
         if processed_song:
             queue.add(processed_song)
-            title = processed_song['title']
-            thumbnail = processed_song['thumbnail']
+            title = processed_song.title
+            thumbnail = processed_song.thumbnail
 
             success_embed = self.make_embed(
                 title="Added to queue",
@@ -754,24 +988,13 @@ class MusicCog(commands.Cog):
                 ]
             )
 
-            await interaction.channel.send(embed=success_embed)
+            await scheduler.send(interaction.channel, embed=success_embed)
 
         try:
-            await loading_message.delete()
+            await scheduler.delete(loading_message)
         except Exception:
             pass
 
-        if not interaction.user.voice:
-            await interaction.followup.send(
-                embed=self.make_embed(
-                    title="Voice channel required",
-                    description="Join a voice channel and try again.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
         voice_client = interaction.guild.voice_client
         if not voice_client or not voice_client.is_connected():
             channel = interaction.user.voice.channel
@@ -780,26 +1003,18 @@ class MusicCog(commands.Cog):
             voice_channel = voice_client.channel
 
             if SET_VC_STATUS_TO_MUSIC_PLAYING:
-                current_song = (queue.peek()['title'] if queue.peek() else "Music")
+                current_song = (queue.peek().title if queue.peek() else "Music")
                 try:
                     await voice_channel.edit(status=f"Listening to: {current_song}")
                 except Exception:
                     pass
 
-        if voice_client and voice_client.channel and interaction.user.voice.channel != voice_client.channel:
-            await interaction.followup.send(
-                embed=self.make_embed(
-                    title="Wrong voice channel",
-                    description="You must be in the same voice channel as the bot.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-        else:
-            if not queue.playing and not voice_client.is_playing() and not queue.is_empty():
-                await self.play_next(guild=interaction.guild, voice_client=voice_client, interaction=interaction)
+        if not queue.is_empty():
+            self.notify_player(interaction.guild, ENQUEUE, interaction)
 
     async def mostplayed_callback(self, interaction: discord.Interaction, song: str):
+        if await self.guards.reject(interaction, (MUTED, IN_VOICE, SAME_CHANNEL)):
+            return
         await interaction.response.defer()
 
         loading_embed = self.make_embed(
@@ -810,7 +1025,7 @@ class MusicCog(commands.Cog):
 
         loading_message = await interaction.followup.send(embed=loading_embed)
 
-        search_query = f"ytsearch:{song}"
+        search_query = song if song.startswith("http") else f"ytsearch:{song}"
 
         try:
             info = await song_loader.extract_info_async(search_query)
@@ -825,18 +1040,15 @@ class MusicCog(commands.Cog):
             )
             return
 
-        if interaction.guild.id not in guild_queues:
-            guild_queues[interaction.guild.id] = OptimizedQueue()
-
-        queue = guild_queues[interaction.guild.id]
+        queue = self.queue_for(interaction.guild.id)
 
         entry = info["entries"][0] if "entries" in info and info["entries"] else info
 
-        processed_song = await self.process_single_entry(entry)
+        processed_song = await self.process_single_entry(entry, interaction.user.id)
         if processed_song:
             queue.add(processed_song)
-            title = processed_song['title']
-            thumbnail = processed_song['thumbnail']
+            title = processed_song.title
+            thumbnail = processed_song.thumbnail
 
             success_embed = self.make_embed(
                 title="Added to queue",
@@ -848,24 +1060,13 @@ class MusicCog(commands.Cog):
                 ]
             )
 
-            await interaction.channel.send(embed=success_embed)
+            await scheduler.send(interaction.channel, embed=success_embed)
 
         try:
-            await loading_message.delete()
+            await scheduler.delete(loading_message)
         except Exception:
             pass
 
-        if not interaction.user.voice:
-            await interaction.followup.send(
-                embed=self.make_embed(
-                    title="Voice channel required",
-                    description="Join a voice channel and try again.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
         voice_client = interaction.guild.voice_client
         if not voice_client or not voice_client.is_connected():
             channel = interaction.user.voice.channel
@@ -874,62 +1075,33 @@ class MusicCog(commands.Cog):
             voice_channel = voice_client.channel
 
             if SET_VC_STATUS_TO_MUSIC_PLAYING:
-                current_song = (queue.peek()['title'] if queue.peek() else "Music")
+                current_song = (queue.peek().title if queue.peek() else "Music")
                 try:
                     await voice_channel.edit(status=f"Listening to: {current_song}")
                 except Exception:
                     pass
 
-        if voice_client and voice_client.channel and interaction.user.voice.channel != voice_client.channel:
-            await interaction.followup.send(
-                embed=self.make_embed(
-                    title="Wrong voice channel",
-                    description="You must be in the same voice channel as the bot.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-        else:
-            if not queue.playing and not voice_client.is_playing() and not queue.is_empty():
-                await self.play_next(guild=interaction.guild, voice_client=voice_client, interaction=interaction)
+        if not queue.is_empty():
+            self.notify_player(interaction.guild, ENQUEUE, interaction)
 
     @app_commands.command(name="play", description="Plays music")
-    @app_commands.describe(song="URL or search term")
-    async def play(self, interaction: discord.Interaction, song: str):
-        if await self.check_timeout_decorator(interaction):
-            return
-        else:
-            try:
-                await interaction.response.defer()
-            except:
-                pass
+    @app_commands.describe(song="URL or search term", play_next="Play before the rest of the queue")
+    @guarded(MUTED, IN_VOICE, SAME_CHANNEL)
+    async def play(self, interaction: discord.Interaction, song: str, play_next: bool = False):
+        try:
+            await interaction.response.defer()
+        except:
+            pass
 
-        if interaction.guild.id not in guild_queues:
-            guild_queues[interaction.guild.id] = OptimizedQueue()
-        queue = guild_queues[interaction.guild.id]
+        queue = self.queue_for(interaction.guild.id)
         voice_client = interaction.guild.voice_client
-
-        if voice_client and voice_client.channel and interaction.user.voice and interaction.user.voice.channel != voice_client.channel:
-            await interaction.followup.send(
-                embed=self.make_embed(
-                    title="Wrong voice channel",
-                    description="You must be in the same voice channel as the bot.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
-        if not interaction.user.voice:
-            await interaction.followup.send(
-                embed=self.make_embed(
-                    title="Voice channel required",
-                    description="Join a voice channel and try again.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
+        # Moderators jump ahead of everyone else's "play next" songs
+        if not play_next:
+            lane = LANE_NORMAL
+        elif interaction.user.guild_permissions.kick_members:
+            lane = LANE_DJ
+        else:
+            lane = LANE_NEXT
 
         loading_embed = self.make_embed(
             title="Loading",
@@ -939,9 +1111,13 @@ class MusicCog(commands.Cog):
         loading_message = await interaction.followup.send(embed=loading_embed)
 
         search_query = song if song.startswith("http") else f"ytsearch:{song}"
+        lazy_playlist = is_playlist_url(search_query)
 
         try:
-            info = await song_loader.extract_info_async(search_query)
+            if lazy_playlist:
+                info = await song_loader.extract_playlist_async(search_query)
+            else:
+                info = await song_loader.extract_info_async(search_query)
         except Exception as e:
             await interaction.followup.send(
                 embed=self.make_embed(
@@ -964,37 +1140,50 @@ class MusicCog(commands.Cog):
                 color=0xf39c12
             )
 
-            processing_message = await interaction.channel.send(embed=processing_embed)
-
-            processed_songs = await self.process_song_entries(entries, interaction.guild.id)
-
-            titles_list = "\n".join([f"- {song['title']}" for song in processed_songs[:10]])
-            if len(processed_songs) > 10:
-                titles_list += f"\n\n...and {len(processed_songs) - 10} more."
-
-            initial_len = max(0, len(queue.queue) - len(processed_songs))
-            wait_seconds = sum(song['duration'] for song in queue.queue[:initial_len]) if initial_len > 0 else 0
-
-            success_embed = self.make_embed(
-                title="Playlist added",
-                description=f"{len(processed_songs)} songs added to queue.\n\n{titles_list}",
-                color=0x2ecc71,
-                thumbnail=(entries[0].get("thumbnail") if entries else None),
-                fields=[
-                    ("Position", f"```\n#{initial_len + 1}\n```", True),
-                    ("Estimated time", f"```\n{self.format_time(wait_seconds)}\n```", True),
-                ]
-            )
+            processing_message = await scheduler.send(interaction.channel, embed=processing_embed)
+
+            if lazy_playlist:
+                processed_songs = await self.enqueue_placeholders(entries, interaction.guild.id, interaction.user.id, lane)
+            else:
+                # A search comes back as a one-entry playlist, it may queue a song again like a direct link
+                processed_songs = await self.process_song_entries(
+                    entries,
+                    interaction.guild.id,
+                    interaction.user.id,
+                    lane,
+                    dedupe=QUEUE_DEDUPE_PLAYLISTS and len(entries) > 1,
+                )
 
-            await interaction.channel.send(embed=success_embed)
+            if not processed_songs:
+                await interaction.followup.send(embed=self.embeds.constant("nothing_new"), ephemeral=True)
+            else:
+                initial_len = queue.position(processed_songs[0].entry_id)
+                wait_seconds = sum(int(track.duration or 0) for track in queue.page(0, initial_len))
+
+                titles_list = "\n".join([f"- {song.title}" for song in processed_songs[:10]])
+                if len(processed_songs) > 10:
+                    titles_list += f"\n\n...and {len(processed_songs) - 10} more."
+
+                success_embed = self.make_embed(
+                    title="Playlist added",
+                    description=f"{len(processed_songs)} songs added to queue.\n\n{titles_list}",
+                    color=0x2ecc71,
+                    thumbnail=processed_songs[0].thumbnail,
+                    fields=[
+                        ("Position", f"```\n#{initial_len + 1}\n```", True),
+                        ("Estimated time", f"```\n{format_time(wait_seconds)}\n```", True),
+                    ]
+                )
+
+                await scheduler.send(interaction.channel, embed=success_embed)
 
         else:
-            processed_song = await self.process_single_entry(info)
+            processed_song = await self.process_single_entry(info, interaction.user.id)
             if processed_song:
-                queue.add(processed_song)
-                title = processed_song['title']
-                thumbnail = processed_song['thumbnail']
-                duration = processed_song['duration']
+                await queue.add_many([processed_song], lane=lane)
+                title = processed_song.title
+                thumbnail = processed_song.thumbnail
+                duration = processed_song.duration
 
                 success_embed = self.make_embed(
                     title="Added to queue",
@@ -1002,20 +1191,20 @@ class MusicCog(commands.Cog):
                     color=0x2ecc71,
                     thumbnail=thumbnail,
                     fields=[
-                        ("Duration", f"```\n{self.format_time(duration)}\n```", True),
-                        ("Position", f"```\n#{len(queue.queue)}\n```", True),
+                        ("Duration", f"```\n{format_time(duration)}\n```", True),
+                        ("Position", f"```\n#{queue.position(processed_song.entry_id) + 1}\n```", True),
                     ]
                 )
 
-                await interaction.channel.send(embed=success_embed)
+                await scheduler.send(interaction.channel, embed=success_embed)
 
         try:
             if processing_message:
-                await processing_message.delete()
+                await scheduler.delete(processing_message)
         except Exception:
             pass
         try:
-            await loading_message.delete()
+            await scheduler.delete(loading_message)
         except Exception:
             pass
 
@@ -1027,54 +1216,28 @@ class MusicCog(commands.Cog):
             voice_channel = voice_client.channel
 
             if SET_VC_STATUS_TO_MUSIC_PLAYING:
-                current_song = (queue.peek()['title'] if queue.peek() else "Music")
+                current_song = (queue.peek().title if queue.peek() else "Music")
                 try:
                     await voice_channel.edit(status=f"Listening to: {current_song}")
                 except Exception:
                     pass
 
-        if not queue.playing and not voice_client.is_playing():
-            await self.play_next(guild=interaction.guild, voice_client=voice_client, interaction=interaction)
+        self.notify_player(interaction.guild, ENQUEUE, interaction)
 
     @app_commands.command(name="skip", description="skips the current song")
+    @guarded(MUTED, GUARD_PLAYING, SAME_CHANNEL)
     async def skip(self, interaction: discord.Interaction):
-        voice_client = interaction.guild.voice_client
-        if await self.check_timeout_decorator(interaction):
-            return
-
-        if not voice_client or not voice_client.is_playing():
-            await interaction.response.send_message(
-                embed=self.make_embed(
-                    title="Nothing playing",
-                    description="Use /play to start music.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
-        if not interaction.user.voice or interaction.user.voice.channel != voice_client.channel:
-            await interaction.response.send_message(
-                embed=self.make_embed(
-                    title="Wrong voice channel",
-                    description="You must be in the same voice channel as the bot.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
         queue = guild_queues.get(interaction.guild.id)
         if queue:
-            queue.playing = False
+            queue.cancel_prefetch_task()
 
-        voice_client.stop()
+        self.notify_player(interaction.guild, SKIP, interaction)
 
-        next_song = queue.queue[0] if queue and queue.queue else None
+        next_song = queue.peek() if queue else None
 
         if next_song:
-            title = next_song['title']
-            thumbnail = next_song['thumbnail']
+            title = next_song.title
+            thumbnail = next_song.thumbnail
 
             skip_embed = self.make_embed(
                 title="Skipped",
@@ -1096,39 +1259,14 @@ class MusicCog(commands.Cog):
 
             await interaction.response.send_message(embed=skip_embed)
 
-        if queue and not queue.playing:
-            await self.play_next(interaction.guild, voice_client, interaction=interaction)
-
     @app_commands.command(name="queue", description="lists queued songs")
+    @guarded(MUTED, SAME_CHANNEL)
     async def list(self, interaction: discord.Interaction):
-        queue = guild_queues.get(interaction.guild.id)
+        queue = self.queue_for(interaction.guild.id, create=False)
         wait_time = 0
-        if await self.check_timeout_decorator(interaction):
-            return
-
-        voice_client = interaction.guild.voice_client
-        if voice_client and voice_client.channel:
-            if not interaction.user.voice or interaction.user.voice.channel != voice_client.channel:
-                await interaction.response.send_message(
-                    embed=self.make_embed(
-                        title="Wrong voice channel",
-                        description="You must be in the same voice channel as the bot.",
-                        color=0xe74c3c
-                    ),
-                    ephemeral=True
-                )
-                return
 
         if not queue or not queue.queue:
-            empty_embed = self.make_embed(
-                title="Queue is empty",
-                description="Use /play to add some music.",
-                color=0x95a5a6,
-                fields=[
-                    ("Quick start", "```\n/play <song>\n/chart\n```", False)
-                ]
-            )
-            await interaction.response.send_message(embed=empty_embed)
+            await interaction.response.send_message(embed=self.embeds.constant("queue_empty"))
             return
 
         embed = self.make_embed(
@@ -1143,17 +1281,17 @@ class MusicCog(commands.Cog):
         )
 
         display_count = min(15, len(queue.queue))
-        for i, song_data in enumerate(queue.queue[:display_count]):
-            title = song_data['title']
-            duration = song_data['duration']
+        for i, song_data in enumerate(queue.page(0, display_count)):
+            title = song_data.title
+            duration = song_data.duration
             embed.add_field(
                 name=f"{i + 1}. {title}",
-                value=f"```\nDuration: {self.format_time(duration)} • Starts in: {self.format_time(wait_time)}\n```",
+                value=f"```\nDuration: {format_time(duration)} • Starts in: {format_time(wait_time)}\n```",
                 inline=False
             )
             wait_time += duration
 
-        total_duration = self.format_time(sum(song['duration'] for song in queue.queue))
+        total_duration = format_time(queue.total_duration)
         if len(queue.queue) > display_count:
             embed.add_field(
                 name="More",
@@ -1170,26 +1308,14 @@ class MusicCog(commands.Cog):
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="stop", description="Disconnects the Bot")
+    @guarded(MUTED, SAME_CHANNEL)
     async def leave(self, i: discord.Interaction):
-        if await self.check_timeout_decorator(i):
-            return
         voice_client = i.guild.voice_client
-        if voice_client and voice_client.channel:
-            if not i.user.voice or i.user.voice.channel != voice_client.channel:
-                await i.response.send_message(
-                    embed=self.make_embed(
-                        title="Wrong voice channel",
-                        description="You must be in the same voice channel as the bot.",
-                        color=0xe74c3c
-                    ),
-                    ephemeral=True
-                )
-                return
 
-        queue = guild_queues.get(i.guild.id)
+        queue = self.queue_for(i.guild.id, create=False)
 
         if queue and queue.queue:
-            total_duration = sum(song_data[3] for _source, song_data in queue.queue)
+            total_duration = queue.total_duration
             cleared_count = len(queue.queue)
             queue.clear()
         else:
@@ -1207,7 +1333,7 @@ class MusicCog(commands.Cog):
             thumbnail=safe_avatar(i.user),
             fields=[
                 ("Session summary",
-                 f"```\nTime left in queue: {self.format_time(total_duration)}\nSongs cleared: {cleared_count}\n```",
+                 f"```\nTime left in queue: {format_time(total_duration)}\nSongs cleared: {cleared_count}\n```",
                  False)
             ]
         )
@@ -1222,46 +1348,19 @@ class MusicCog(commands.Cog):
             await i.response.send_message(embed=embed)
             await self.send_static_message()
         else:
-            await i.response.send_message(
-                embed=self.make_embed(
-                    title="Not connected",
-                    description="The bot is not connected to a voice channel.",
-                    color=0xe74c3c
-                )
-            )
+            await i.response.send_message(embed=self.embeds.constant("not_connected"))
 
     @app_commands.command(name="shuffle", description="Shuffles the queue")
+    @guarded(MUTED, SAME_CHANNEL)
     async def shuffle(self, interaction: discord.Interaction):
-        if await self.check_timeout_decorator(interaction):
-            return
-
-        voice_client = interaction.guild.voice_client
-        if voice_client and voice_client.channel:
-            if not interaction.user.voice or interaction.user.voice.channel != voice_client.channel:
-                await interaction.response.send_message(
-                    embed=self.make_embed(
-                        title="Wrong voice channel",
-                        description="You must be in the same voice channel as the bot.",
-                        color=0xe74c3c
-                    ),
-                    ephemeral=True
-                )
-                return
-
-        queue = guild_queues.get(interaction.guild.id)
+        queue = self.queue_for(interaction.guild.id, create=False)
 
         if not queue or not queue.queue:
-            await interaction.response.send_message(
-                embed=self.make_embed(
-                    title="Queue is empty",
-                    description="Nothing to shuffle.",
-                    color=0x95a5a6
-                ),
-                ephemeral=True
-            )
+            await interaction.response.send_message(embed=self.embeds.constant("shuffle_empty"), ephemeral=True)
             return
 
-        random.shuffle(queue.queue)
+        queue.shuffle()
+        self.queue_store.touch()
 
         embed = self.make_embed(
             title="Queue shuffled",
@@ -1276,18 +1375,18 @@ class MusicCog(commands.Cog):
 
         wait_time = 0
         display_count = min(10, len(queue.queue))
-        for i, (source, song_data) in enumerate(queue.queue[:display_count]):
-            title = song_data[0]
-            duration = song_data[3]
+        for i, song_data in enumerate(queue.page(0, display_count)):
+            title = song_data.title
+            duration = song_data.duration
 
             embed.add_field(
                 name=f"{i + 1}. {title}",
-                value=f"```\nDuration: {self.format_time(duration)} • Starts in: {self.format_time(wait_time)}\n```",
+                value=f"```\nDuration: {format_time(duration)} • Starts in: {format_time(wait_time)}\n```",
                 inline=False
             )
             wait_time += duration
 
-        total_duration = self.format_time(sum(song['duration'] for song in queue.queue))
+        total_duration = format_time(queue.total_duration)
         if len(queue.queue) > display_count:
             embed.add_field(
                 name="More",
@@ -1304,33 +1403,10 @@ class MusicCog(commands.Cog):
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="pause", description="Pauses or resumes the playback")
+    @guarded(MUTED, GUARD_PLAYING, SAME_CHANNEL)
     async def pause(self, interaction: discord.Interaction):
-        if await self.check_timeout_decorator(interaction):
-            return
         voice_client = interaction.guild.voice_client
 
-        if not voice_client or (not voice_client.is_playing() and not voice_client.is_paused()):
-            await interaction.response.send_message(
-                embed=self.make_embed(
-                    title="Nothing playing",
-                    description="Use /play to start music.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
-        if not interaction.user.voice or interaction.user.voice.channel != voice_client.channel:
-            await interaction.response.send_message(
-                embed=self.make_embed(
-                    title="Wrong voice channel",
-                    description="You must be in the same voice channel as the bot.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
         if voice_client.is_paused():
             voice_client.resume()
             embed = self.make_embed(
@@ -1356,41 +1432,130 @@ class MusicCog(commands.Cog):
 
         await interaction.response.send_message(embed=embed)
 
+    def seek_failed_embed(self) -> discord.Embed:
+        return self.make_embed(
+            title="Seek failed",
+            description="Couldn't jump to that position, try again.",
+            color=0xe74c3c
+        )
+
+    @app_commands.command(name="seek", description="Jumps to a position in the current song")
+    @app_commands.describe(position="Position in the song, like 1:30")
+    @guarded(MUTED, GUARD_PLAYING, SAME_CHANNEL)
+    async def seek(self, interaction: discord.Interaction, position: str):
+        voice_client = interaction.guild.voice_client
+        queue = guild_queues.get(interaction.guild.id)
+        player = self.players.get(interaction.guild.id)
+        track = queue.current if queue else None
+
+        if (
+            not voice_client
+            or (not voice_client.is_playing() and not voice_client.is_paused())
+            or not track
+            or not player
+            or player.source is None
+        ):
+            await interaction.response.send_message(embed=self.embeds.constant(GUARD_PLAYING), ephemeral=True)
+            return
+
+        seconds = parse_timestamp(position)
+        if seconds is None or (track.duration and seconds >= track.duration):
+            await interaction.response.send_message(
+                embed=self.make_embed(
+                    title="Invalid position",
+                    description=f"Use mm:ss within the song length ({format_time(track.duration or 0)}).",
+                    color=0xe74c3c
+                ),
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.defer()
+
+        current_source = player.source
+        try:
+            source = await self.open_at(track, seconds, pcm=isinstance(current_source, MixerSource))
+        except Exception as e:
+            print(f"Error seeking: {e}")
+            source = None
+
+        if source is None or queue.current is not track or player.source is not current_source:
+            if source is not None:
+                source.cleanup()
+            await interaction.followup.send(embed=self.seek_failed_embed(), ephemeral=True)
+            return
+
+        if isinstance(current_source, MixerSource):
+            current_source.seek(source, seconds)
+        else:
+            was_paused = voice_client.is_paused()
+            new_source = TrackedSource(source, seconds)
+            try:
+                # Swapping the source keeps the same track playing, no track_end is fired
+                voice_client.source = new_source
+            except Exception as e:
+                print(f"Error seeking: {e}")
+                new_source.cleanup()
+                await interaction.followup.send(embed=self.seek_failed_embed(), ephemeral=True)
+                return
+            if was_paused:
+                voice_client.pause()
+            player.source = new_source
+            current_source.cleanup()
+
+        # The next song is due sooner or later than the running prefetch assumed
+        self.schedule_prefetch(queue, track.duration, self.mixers.get(interaction.guild.id), seconds)
+
+        await interaction.followup.send(
+            embed=self.make_embed(
+                title="Seeked",
+                description=f"{track.title}\nNow at {format_time(seconds)} / {format_time(track.duration or 0)}",
+                color=0x3498db,
+                author_name=interaction.user.display_name,
+                author_icon=safe_avatar(interaction.user),
+                footer="Use /seek mm:ss to jump again",
+                footer_icon=safe_avatar(self.bot.user)
+            )
+        )
+
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
-        if member.bot:
+        if member.bot and member.id != self.bot.user.id:
+            return
+
+        voice_client = member.guild.voice_client
+        if not voice_client or not voice_client.channel:
             return
+        if voice_client.channel not in (before.channel, after.channel):
+            return
+
+        # One pending disconnect per voice client, a returning listener cancels it
+        if any(not m.bot for m in voice_client.channel.members):
+            self.idle_reaper.cancel(member.guild.id)
+        else:
+            self.idle_reaper.arm(member.guild.id)
+
+    async def disconnect_idle(self, guild_id: int) -> bool:
+        guild = self.bot.get_guild(guild_id)
+        voice_client = guild.voice_client if guild else None
+        if not voice_client or not voice_client.is_connected():
+            return False
+        if any(not m.bot for m in voice_client.channel.members):
+            return False
 
-        if before.channel and before.channel != after.channel:
-            voice_client = before.channel.guild.voice_client
-            if voice_client and voice_client.channel == before.channel:
-                members_in_channel = [m for m in before.channel.members if not m.bot]
-                if len(members_in_channel) == 0:
-                    await asyncio.sleep(5)
-
-                    if voice_client.is_connected():
-                        current_members = [m for m in voice_client.channel.members if not m.bot]
-                        if len(current_members) == 0:
-                            guild_id = before.channel.guild.id
-                            queue = guild_queues.get(guild_id)
-                            if queue:
-                                queue.clear()
-                                queue.playing = False
-                                del guild_queues[guild_id]
-                            voice_channel = voice_client.channel
-                            try:
-                                await voice_channel.edit(status=None)
-                            except Exception:
-                                pass
-                            await voice_client.disconnect(force=True)
-                            try:
-                                channel = await self.bot.fetch_channel(I_CHANNEL)
-                                if channel:
-                                    await self.send_static_message()
-                                else:
-                                    print(f"Error: Channel with ID {I_CHANNEL} not found after fetch.")
-                            except Exception as e:
-                                print(f"Error sending auto-disconnect message: {e}")
+        queue = guild_queues.get(guild_id)
+        if queue:
+            queue.clear()
+            del guild_queues[guild_id]
+        self.stop_player(guild_id)
+        voice_channel = voice_client.channel
+        try:
+            await voice_channel.edit(status=None)
+        except Exception:
+            pass
+        await voice_client.disconnect(force=True)
+        await self.send_static_message()
+        return True
 
     @commands.Cog.listener("on_voice_state_update")
     async def on_voice_state_update_bot_kick(self, member, before, after):
@@ -1399,14 +1564,9 @@ class MusicCog(commands.Cog):
             if guild_id in guild_queues:
                 queue = guild_queues[guild_id]
                 queue.clear()
-                queue.playing = False
                 del guild_queues[guild_id]
-            try:
-                channel = await self.bot.fetch_channel(I_CHANNEL)
-                if channel:
-                    await self.send_static_message()
-            except Exception as e:
-                print(f"Error sending disconnect message: {e}")
+            self.stop_player(guild_id)
+            await self.send_static_message()
 
     @app_commands.command(name="musicmute", description="Timeout a user from using music commands")
     @app_commands.describe(user="The user to timeout", duration="Duration in minutes")
@@ -1436,19 +1596,9 @@ class MusicCog(commands.Cog):
             )
             return
 
-        timeout_file = "timeouts.json"
-        timeouts = {}
-
-        if os.path.exists(timeout_file):
-            try:
-                with open(timeout_file, 'r') as f:
-                    timeouts = json.load(f)
-            except json.JSONDecodeError:
-                timeouts = {}
-
         end_time = datetime.now() + timedelta(minutes=duration)
 
-        timeouts[str(user.id)] = {
+        self.mutes.mute(user.id, {
             "user_id": user.id,
             "username": user.display_name,
             "timeout_by": interaction.user.id,
@@ -1457,21 +1607,7 @@ class MusicCog(commands.Cog):
             "end_time": end_time.isoformat(),
             "duration_minutes": duration,
             "guild_id": interaction.guild.id
-        }
-
-        try:
-            with open(timeout_file, 'w') as f:
-                json.dump(timeouts, f, indent=2)
-        except Exception as e:
-            await interaction.response.send_message(
-                embed=self.make_embed(
-                    title="Error",
-                    description=f"Failed to save timeout data.\n\n{e}",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
+        })
 
         embed = self.make_embed(
             title="User timed out",
@@ -1487,91 +1623,6 @@ class MusicCog(commands.Cog):
 
         await interaction.response.send_message(embed=embed, ephemeral=True, delete_after=10, silent=True)
 
-    def cleanup_expired_timeouts(self):
-        timeout_file = "timeouts.json"
-
-        if not os.path.exists(timeout_file):
-            return
-
-        try:
-            with open(timeout_file, 'r') as f:
-                timeouts = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return
-
-        current_time = datetime.now()
-        expired_users = []
-
-        for user_id, timeout_data in list(timeouts.items()):
-            end_time = datetime.fromisoformat(timeout_data["end_time"])
-            if current_time > end_time:
-                expired_users.append(user_id)
-
-        for user_id in expired_users:
-            del timeouts[user_id]
-
-        if expired_users:
-            try:
-                with open(timeout_file, 'w') as f:
-                    json.dump(timeouts, f, indent=2)
-            except Exception as e:
-                print(f"Error updating timeout file: {e}")
-
-    def is_user_timed_out(self, user_id: int) -> bool:
-        self.cleanup_expired_timeouts()
-
-        timeout_file = "timeouts.json"
-
-        if not os.path.exists(timeout_file):
-            return False
-
-        try:
-            with open(timeout_file, 'r') as f:
-                timeouts = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return False
-
-        user_key = str(user_id)
-        if user_key not in timeouts:
-            return False
-
-        end_time = datetime.fromisoformat(timeouts[user_key]["end_time"])
-        if datetime.now() > end_time:
-            del timeouts[user_key]
-            try:
-                with open(timeout_file, 'w') as f:
-                    json.dump(timeouts, f, indent=2)
-            except Exception:
-                pass
-            return False
-
-        return True
-
-    async def check_timeout_decorator(self, interaction: discord.Interaction):
-        if self.is_user_timed_out(interaction.user.id):
-            timeout_file = "timeouts.json"
-            with open(timeout_file, 'r') as f:
-                timeouts = json.load(f)
-
-            user_timeout = timeouts[str(interaction.user.id)]
-            end_time = datetime.fromisoformat(user_timeout["end_time"])
-            remaining_minutes = max(0, int((end_time - datetime.now()).total_seconds() / 60))
-
-            embed = self.make_embed(
-                title="Muted",
-                description="You cannot use music commands right now.",
-                color=0xe74c3c,
-                fields=[
-                    ("Time remaining", f"```\n{remaining_minutes} minutes\n```", True),
-                    ("Ends at", f"```\n{end_time.strftime('%H:%M:%S')}\n```", True),
-                    ("By", f"```\n{user_timeout['timeout_by_name']}\n```", True),
-                ]
-            )
-
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-            return True
-        return False
-
     @app_commands.command(name="unmusicmute", description="Remove timeout from a user")
     @app_commands.describe(user="The user to remove timeout from")
     async def untimeout_user(self, interaction: discord.Interaction, user: discord.Member):
@@ -1586,27 +1637,7 @@ class MusicCog(commands.Cog):
             )
             return
 
-        timeout_file = "timeouts.json"
-
-        if not os.path.exists(timeout_file):
-            await interaction.response.send_message(
-                embed=self.make_embed(
-                    title="No timeouts",
-                    description="No timeout data found.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
-        try:
-            with open(timeout_file, 'r') as f:
-                timeouts = json.load(f)
-        except json.JSONDecodeError:
-            timeouts = {}
-
-        user_key = str(user.id)
-        if user_key not in timeouts:
+        if not self.mutes.unmute(user.id):
             await interaction.response.send_message(
                 embed=self.make_embed(
                     title="Not muted",
@@ -1617,22 +1648,6 @@ class MusicCog(commands.Cog):
             )
             return
 
-        del timeouts[user_key]
-
-        try:
-            with open(timeout_file, 'w') as f:
-                json.dump(timeouts, f, indent=2)
-        except Exception as e:
-            await interaction.response.send_message(
-                embed=self.make_embed(
-                    title="Error",
-                    description=f"Failed to save timeout data.\n\n{e}",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
         embed = self.make_embed(
             title="Timeout removed",
             description=f"{user.display_name} can now use music commands again.",
@@ -1646,46 +1661,18 @@ class MusicCog(commands.Cog):
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="clearqueue", description="Vote to clear the entire queue")
+    @guarded(MUTED, IN_VOICE, SAME_CHANNEL)
     async def clear_queue(self, interaction: discord.Interaction):
-        if await self.check_timeout_decorator(interaction):
-            return
-
         voice_client = interaction.guild.voice_client
 
-        if not interaction.user.voice:
-            await interaction.response.send_message(
-                embed=self.make_embed(
-                    title="Voice channel required",
-                    description="Join a voice channel and try again.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
-        if interaction.user.voice.channel != voice_client.channel:
-            await interaction.response.send_message(
-                embed=self.make_embed(
-                    title="Wrong voice channel",
-                    description="You must be in the same voice channel as the bot to start a vote.",
-                    color=0xe74c3c
-                ),
-                ephemeral=True
-            )
-            return
-
         guild_id = interaction.guild.id
-        queue = guild_queues.get(guild_id)
+        queue = self.queue_for(guild_id, create=False)
 
         if interaction.user.guild_permissions.kick_members:
             cleared_count = len(queue.queue)
-            total_duration = sum(song['duration'] for song in queue.queue)
+            total_duration = queue.total_duration
             queue.clear()
-            queue.playing = False
-            try:
-                voice_client.stop()
-            except Exception:
-                pass
+            self.notify_player(interaction.guild, SKIP)
 
             embed = self.make_embed(
                 title="Queue cleared",
@@ -1694,7 +1681,7 @@ class MusicCog(commands.Cog):
                 thumbnail=safe_avatar(interaction.user),
                 fields=[
                     ("Songs cleared", f"```\n{cleared_count}\n```", True),
-                    ("Time removed", f"```\n{self.format_time(total_duration)}\n```", True)
+                    ("Time removed", f"```\n{format_time(total_duration)}\n```", True)
                 ]
             )
             await interaction.response.send_message(embed=embed)
@@ -1715,13 +1702,9 @@ class MusicCog(commands.Cog):
 
         if total_voters == 1:
             cleared_count = len(queue.queue)
-            total_duration = sum(song['duration'] for song in queue.queue)
+            total_duration = queue.total_duration
             queue.clear()
-            queue.playing = False
-            try:
-                voice_client.stop()
-            except Exception:
-                pass
+            self.notify_player(interaction.guild, SKIP)
             embed = self.make_embed(
                 title="Queue cleared",
                 description=f"Cleared by {interaction.user.display_name}.",
@@ -1729,7 +1712,7 @@ class MusicCog(commands.Cog):
                 thumbnail=safe_avatar(interaction.user),
                 fields=[
                     ("Songs cleared", f"```\n{cleared_count}\n```", True),
-                    ("Time removed", f"```\n{self.format_time(total_duration)}\n```", True)
+                    ("Time removed", f"```\n{format_time(total_duration)}\n```", True)
                 ]
             )
             await interaction.response.send_message(embed=embed)
@@ -1781,13 +1764,9 @@ class MusicCog(commands.Cog):
 
                 if len(self.yes) >= self.required and not self.ended_early:
                     cleared_count = len(queue.queue)
-                    total_duration = sum(song['duration'] for song in queue.queue)
+                    total_duration = queue.total_duration
                     queue.clear()
-                    queue.playing = False
-                    try:
-                        voice_client.stop()
-                    except Exception:
-                        pass
+                    parent.notify_player(interaction.guild, SKIP)
 
                     result_embed = parent.make_embed(
                         title="Vote passed",
@@ -1795,7 +1774,7 @@ class MusicCog(commands.Cog):
                         color=0x2ecc71,
                         fields=[
                             ("Songs cleared", f"```\n{cleared_count}\n```", True),
-                            ("Time removed", f"```\n{parent.format_time(total_duration)}\n```", True)
+                            ("Time removed", f"```\n{format_time(total_duration)}\n```", True)
                         ]
                     )
 
@@ -1868,13 +1847,9 @@ class MusicCog(commands.Cog):
 
         if yes_count >= required:
             cleared_count = len(queue.queue)
-            total_duration = sum(song['duration'] for song in queue.queue)
+            total_duration = queue.total_duration
             queue.clear()
-            queue.playing = False
-            try:
-                voice_client.stop()
-            except Exception:
-                pass
+            self.notify_player(interaction.guild, SKIP)
 
             result_embed = self.make_embed(
                 title="Vote passed",
@@ -1882,7 +1857,7 @@ class MusicCog(commands.Cog):
                 color=0x2ecc71,
                 fields=[
                     ("Songs cleared", f"```\n{cleared_count}\n```", True),
-                    ("Time removed", f"```\n{self.format_time(total_duration)}\n```", True)
+                    ("Time removed", f"```\n{format_time(total_duration)}\n```", True)
                 ]
             )
         else:
@@ -1902,7 +1877,90 @@ class MusicCog(commands.Cog):
         except Exception:
             await interaction.followup.send(embed=result_embed)
 
+    async def load_leaderboard(self):
+        try:
+            longest_window = max(length for length in WINDOWS.values() if length)
+            self.leaderboard.load_totals(await self.history.totals())
+            self.leaderboard.load_recent(await self.history.since(time.time() - longest_window))
+        except Exception as e:
+            print(f"Error loading leaderboard from play history: {e}")
+
+    @app_commands.command(name="musicstats", description="Shows music system statistics")
+    async def music_stats(self, interaction: discord.Interaction):
+        if not interaction.user.guild_permissions.kick_members:
+            await interaction.response.send_message(
+                embed=self.make_embed(
+                    title="No permission",
+                    description="You don't have permission to view music statistics.",
+                    color=0xe74c3c
+                ),
+                ephemeral=True
+            )
+            return
+
+        guild_id = interaction.guild.id
+        loader = song_loader.stats()
+        modes = loader.pop("playback").get(guild_id, {})
+        # What this guild saved by copying Opus streams instead of re-encoding them
+        playback = {"passthrough_ratio": song_loader.passthrough_ratio(guild_id), **modes}
+
+        sections = [
+            ("Playback", playback),
+            ("Loader", {k: v for k, v in loader.items() if not isinstance(v, dict)}),
+            ("Track cache", loader["cache"]),
+            ("Extractor", loader["backend"]),
+        ]
+        if song_loader.audio_cache:
+            sections.append(("Audio cache", song_loader.audio_cache.stats()))
+        player = self.players.get(guild_id)
+        if player:
+            sections.append(("Player", player.stats()))
+        mixer = self.mixers.get(guild_id)
+        if mixer:
+            sections.append(("Mixer", mixer.stats()))
+        sections += [
+            ("Now playing", self.now_playing.stats()),
+            ("Idle disconnects", self.idle_reaper.stats()),
+            ("Guards", self.guards.stats()),
+            ("Mutes", self.mutes.stats()),
+            ("Outbound", scheduler.stats()),
+            ("Controls message", self.controls.stats()),
+            ("Embeds", self.embeds.stats()),
+        ]
+
+        await interaction.response.send_message(
+            embed=self.make_embed(
+                title="Music statistics",
+                color=0x3498db,
+                fields=[(name, stats_block(stats), True) for name, stats in sections]
+            ),
+            ephemeral=True
+        )
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, GuardRejected):
+            # Already answered by the guard
+            return
+        # Overriding this stops discord.py from logging, so the traceback is printed here
+        print(f"Error in /{interaction.command.name if interaction.command else 'unknown'}:")
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+        embed = self.embeds.constant("command_error")
+        try:
+            if interaction.response.is_done():
+                await interaction.followup.send(embed=embed, ephemeral=True)
+            else:
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+        except discord.HTTPException as e:
+            print(f"Error answering failed command: {e}")
+
     async def cog_load(self):
+        self.register_embeds()
+        await self.load_leaderboard()
+        self.create_background_task(self.charts.run())
+        self.create_background_task(self.queue_store.run())
+        self.create_background_task(self.now_playing.run())
+        self.mutes.start()
         self.bot.tree.add_command(self.play, guild=discord.Object(id=SYNC_SERVER))
         self.bot.tree.add_command(self.skip, guild=discord.Object(id=SYNC_SERVER))
         self.bot.tree.add_command(self.list, guild=discord.Object(id=SYNC_SERVER))
@@ -1910,11 +1968,23 @@ class MusicCog(commands.Cog):
         self.bot.tree.add_command(self.shuffle, guild=discord.Object(id=SYNC_SERVER))
         self.bot.tree.add_command(self.play_chart, guild=discord.Object(id=SYNC_SERVER))
         self.bot.tree.add_command(self.pause, guild=discord.Object(id=SYNC_SERVER))
+        self.bot.tree.add_command(self.seek, guild=discord.Object(id=SYNC_SERVER))
         self.bot.tree.add_command(self.timeout_user_command, guild=discord.Object(id=SYNC_SERVER))
         self.bot.tree.add_command(self.clear_queue, guild=discord.Object(id=SYNC_SERVER))
 
     async def cog_unload(self):
+        self.queue_store.flush()
+        self.mutes.close()
+        self.idle_reaper.close()
+        for player in self.players.values():
+            player.close()
+        self.players.clear()
         for task in self.background_tasks:
             if not task.done():
                 task.cancel()
+        if self.controls.task and not self.controls.task.done():
+            self.controls.task.cancel()
         song_loader.executor.shutdown(wait=False)
+        song_loader.backend.shutdown()
+        self.autoplay.shutdown()
+        await self.history.close()
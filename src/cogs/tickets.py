@@ -11,6 +11,7 @@ from lang.texts import *
 import logging
 import colorlog
 from modals.embeds import simple_embed
+from util.outbound import scheduler, LOW
 
 if TYPE_CHECKING:
     from cogs.tickets import TicketCog
@@ -87,7 +88,7 @@ class TicketCog(commands.Cog):
         embed.set_thumbnail(url=interaction.guild.icon.url if interaction.guild.icon else None)
         embed.timestamp = discord.utils.utcnow()
         
-        await interaction.channel.send(embed=embed, view=TicketSetupView(self))
+        await scheduler.send(interaction.channel, embed=embed, view=TicketSetupView(self))
         logger.info(f"Ticket setup embed sent by {interaction.user} in channel {interaction.channel}.")
 
     @commands.Cog.listener()
@@ -102,13 +103,13 @@ class TicketCog(commands.Cog):
         if not isinstance(message.channel, discord.Thread):
             logger.warning("Close command used outside of a thread.")
             embed = simple_embed(CAN_ONLY_BE_USED_IN_THREAD, color=0xff0000)
-            await message.channel.send(embed=embed, ephemeral=True)
+            await scheduler.send(message.channel, embed=embed, ephemeral=True)
             return
         
         if message.channel.parent_id != int(TICKET_CHANNEL_ID):
             logger.warning("Close command used in a thread not under the ticket channel.")
             embed = simple_embed(CAN_ONLY_BE_USED_IN_THREAD, color=0xff0000)
-            await message.channel.send(embed=embed, ephemeral=True)
+            await scheduler.send(message.channel, embed=embed, ephemeral=True)
             return
         
         cancel_btn = Button(emoji=UNCHECK, label=CANCEL_BUTTON_LABEL, style=SECONDARY)
@@ -119,11 +120,11 @@ class TicketCog(commands.Cog):
         
         ticket_creator = get_ticket_creator(message.channel.id)
 
-        await message.channel.send(view=view, content=f"{TICKET_CLOSE_PROMPT}".format(ticket_creator=ticket_creator))
+        await scheduler.send(message.channel, view=view, content=f"{TICKET_CLOSE_PROMPT}".format(ticket_creator=ticket_creator))
 
     async def cancel_btn_callback(self, interaction):
         logger.info(f"Cancel button clicked by {interaction.user} in message {interaction.message.id}.")
-        await interaction.message.delete()
+        await scheduler.delete(interaction.message)
 
     async def close_thread_confirmation(self, interaction: discord.Interaction):
         logger.info(f"Close thread confirmation requested by {interaction.user} in thread {interaction.channel}.")
@@ -150,7 +151,7 @@ class TicketCog(commands.Cog):
             TICKET_CREATOR = interaction.user
 
             await thread.add_user(interaction.user)
-            await thread.edit(invitable=False)
+            await scheduler.edit_channel(thread, invitable=False)
 
             embed = discord.Embed(
                 title=f"{TICKET_OVERVIEW_TITLE}",
@@ -182,7 +183,8 @@ class TicketCog(commands.Cog):
 
             message = fields.get("message", DEFAULT_HELP_MESSAGE)
             
-            await thread.send(
+            await scheduler.send(
+                thread,
                 embed=embed,
                 view=PersistentCloseView(bot=self.bot, ticketcog=self),
                 content=f"{support_role.mention if support_role else ''} {supporthilfe_role.mention if supporthilfe_role else ''} {message}"
@@ -241,8 +243,8 @@ class TicketCog(commands.Cog):
 
                 if not has_required_role:
                     embed = simple_embed(TICKET_CLOSED_TIMEOUT, color=0xffaa00)
-                    await after.send(embed=embed, view=None)
-                    await after.remove_user(guild_member)
+                    await scheduler.send(after, priority=LOW, embed=embed, view=None)
+                    await scheduler.remove_thread_member(after, guild_member)
                     logger.info(f"Removed user {guild_member} from archived thread {after.name}.")
                 else:
                     logger.debug(f"User {guild_member} has required role, not removed from thread {after.name}.")
@@ -33,6 +33,11 @@ TEAM_ROLE = _config.get('TEAM_ROLE')
 MOD = _config.get('MOD')
 TRAIL_MOD = _config.get('TRAIL_MOD')
 TICKET_CREATOR_FILE = "config/tickets.json"
+CHART_CACHE_FILE = "config/charts.json"
+PLAY_HISTORY_FILE = "config/play_history.db"
+QUEUE_SNAPSHOT_FILE = "config/queues.json"
+CONTROLS_MESSAGE_FILE = "config/controls_message.json"
+MUTE_FILE = "timeouts.json"
 
 # Emojis for the bot
 CHECK = "<:check:1368203772123283506>"
@@ -57,7 +62,7 @@ PURPLE = discord.ButtonStyle.blurple
 
 # YT_OPTS
 YT_OPTS = {
-    'format': 'bestaudio/best',
+    'format': 'bestaudio[acodec=opus]/bestaudio/best',
     'default_search': 'auto',
     'noplaylist': False,
     'quiet': False,
@@ -83,5 +88,81 @@ YT_OPTS = {
     ],
 }
 
+# Flat playlist listing, entries are resolved one by one when they reach the front of the queue
+YT_PLAYLIST_OPTS = {
+    'extract_flat': 'in_playlist',
+    'quiet': True,
+    'no_warnings': True,
+    'ignoreerrors': True,
+    'skip_download': True,
+    'socket_timeout': 15,
+    'retries': 5,
+}
+
+# yt-dlp extraction backend
+EXTRACTOR_MODE = "thread" # "thread" or "process", process mode runs yt-dlp outside the GIL of the bot
+EXTRACTOR_WORKERS = 4 # Threads or worker processes, each keeps its own YoutubeDL instance
+EXTRACTOR_MAX_IN_FLIGHT = 8 # Max extractions waiting on or running in the pool
+EXTRACTOR_TIMEOUT = 30 # Seconds before a single extraction is given up
+
+# Music track cache
+TRACK_CACHE_MAX_ENTRIES = 2000 # Max resolved tracks kept in memory
+TRACK_CACHE_MAX_BYTES = 8 * 1024 * 1024 # Rough memory cap for the cached metadata
+TRACK_CACHE_METADATA_TTL = 6 * 60 * 60 # Seconds until title, duration, etc. get re-fetched
+TRACK_CACHE_STREAM_TTL = 30 * 60 # Fallback lifetime for stream URLs without an expire= param
+TRACK_CACHE_EXPIRY_MARGIN = 120 # Seconds before the stream URL expires that it is dropped
+
+# Music prefetch
+PREFETCH_LEAD_SECONDS = 30 # Resolve the next song this many seconds before the current one ends
+PREFETCH_DEPTH = 2 # How many upcoming songs get their stream URL resolved ahead of time
+
+# Music play history
+PLAY_HISTORY_LIMIT = 1000 # Entries shown by the History button
+
+# Music autoplay
+AUTOPLAY_RELATED_TTL = 6 * 60 * 60 # Seconds a song's related list from YouTube Music is reused
+AUTOPLAY_EXCLUDE_RECENT = 25 # Songs from the last N plays are never picked again by autoplay
+AUTOPLAY_SEED_POOL = 5 # How many recent plays are tried as seeds when the last one has no fresh suggestions
+
+# Opus passthrough
+OPUS_PASSTHROUGH = True # Copy Opus streams to Discord instead of decoding and re-encoding them
+OPUS_PASSTHROUGH_PROBE = True # Run ffprobe when yt-dlp doesn't report the audio codec
+
+# Crossfade
+CROSSFADE_SECONDS = 0 # Overlap between songs, 0 keeps Opus passthrough and switches sources per song
+
+# Seek and resume
+RESUME_MAX_ATTEMPTS = 3 # Times a song that stopped early is restarted where it left off
+RESUME_END_SLACK = 5 # Seconds before the end where an early stop counts as finished
+
+# Now playing
+NOW_PLAYING_INTERVAL = 15 # Seconds between progress bar edits, shared by all guilds
+
+# Idle voice channels
+IDLE_DISCONNECT_GRACE = 5 # Seconds the bot stays in a voice channel after the last listener left
+
+# Music mutes
+MUTE_WRITE_DEBOUNCE = 2 # Seconds mute changes are collected before the file is rewritten
+
+# Music queue
+QUEUE_DEDUPE_PLAYLISTS = True # Skip playlist songs that are already queued or playing
+
+# Music controls message
+CONTROLS_MESSAGE_DEBOUNCE = 3 # Seconds to wait for more disconnects before editing the controls message
+
+# Queue snapshots
+QUEUE_SNAPSHOT_DEBOUNCE = 5 # Seconds to wait for more queue changes before saving
+QUEUE_SNAPSHOT_INTERVAL = 30 # Seconds between saves while something plays, to keep positions current
+QUEUE_SNAPSHOT_MAX_AGE = 24 * 60 * 60 # Saved queues older than this are not restored
+
+# Music audio cache
+AUDIO_CACHE_ENABLED = False # Set to True to keep often played songs as local Opus files
+AUDIO_CACHE_DIR = "cache/audio"
+AUDIO_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024 # Disk space the cached files may use
+AUDIO_CACHE_MIN_PLAYS = 3 # A song is cached after it was played this often in a guild
+
+# Music charts
+CHART_REFRESH_INTERVAL = 6 * 60 * 60 # Seconds between background refreshes of the trending list
+
 # Embed
 EMBED_FOOTER = "❤️ Shizo | by nino.css"
\ No newline at end of file
@@ -0,0 +1,136 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Optional
+
+
+class AudioCache:
+    def __init__(self, directory: str, max_bytes: int, min_plays: int = 3, max_downloads: int = 1):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_plays = min_plays
+
+        # video id -> file size, least recently played first
+        self.entries: "OrderedDict[str, int]" = OrderedDict()
+        self.bytes_used = 0
+        self.in_progress = set()
+        self._downloads = None
+        self.max_downloads = max_downloads
+
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+
+        self._scan()
+
+    def _path(self, video_id: str) -> str:
+        return os.path.join(self.directory, f"{video_id}.opus")
+
+    def _scan(self):
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                # Left over from a download that never finished
+                os.remove(path)
+                continue
+            if name.endswith(".opus"):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-5], stat.st_size))
+
+        for _mtime, video_id, size in sorted(files):
+            self.entries[video_id] = size
+            self.bytes_used += size
+        self._evict()
+
+    def lookup(self, video_id: Optional[str]) -> Optional[str]:
+        if not video_id or video_id not in self.entries:
+            self.misses += 1
+            return None
+
+        path = self._path(video_id)
+        if not os.path.exists(path):
+            self.bytes_used -= self.entries.pop(video_id)
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(video_id)
+        self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def wants(self, video_id: str, plays: int) -> bool:
+        return plays >= self.min_plays and video_id not in self.entries and video_id not in self.in_progress
+
+    async def store(self, video_id: str, stream_url: str, is_opus: bool = True):
+        if video_id in self.entries or video_id in self.in_progress:
+            return
+
+        if self._downloads is None:
+            self._downloads = asyncio.Semaphore(self.max_downloads)
+
+        self.in_progress.add(video_id)
+        path = self._path(video_id)
+        part_path = f"{path}.part"
+        process = None
+        try:
+            async with self._downloads:
+                # Opus streams are only remuxed into Ogg, everything else is encoded once here
+                codec_args = ["-c:a", "copy"] if is_opus else ["-c:a", "libopus", "-b:a", "128k"]
+                process = await asyncio.create_subprocess_exec(
+                    "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+                    "-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5",
+                    "-i", stream_url, "-vn", *codec_args, "-f", "opus", part_path,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                _, stderr = await process.communicate()
+
+            if process.returncode != 0:
+                print(f"Error caching audio for {video_id}: {stderr.decode(errors='ignore').strip()}")
+                return
+
+            os.replace(part_path, path)
+            size = os.path.getsize(path)
+            self.entries[video_id] = size
+            self.bytes_used += size
+            self.stored += 1
+            self._evict()
+        except asyncio.CancelledError:
+            if process and process.returncode is None:
+                process.kill()
+            raise
+        except Exception as e:
+            print(f"Error caching audio for {video_id}: {e}")
+        finally:
+            self.in_progress.discard(video_id)
+            if os.path.exists(part_path):
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
+
+    def _evict(self):
+        while self.entries and self.bytes_used > self.max_bytes:
+            video_id, size = self.entries.popitem(last=False)
+            self.bytes_used -= size
+            self.evicted += 1
+            try:
+                os.remove(self._path(video_id))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self.entries),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stored": self.stored,
+            "evicted": self.evicted,
+        }
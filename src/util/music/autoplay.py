@@ -0,0 +1,116 @@
+import asyncio
+import concurrent.futures
+import random
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from ytmusicapi import YTMusic
+
+from util.music.history import PlayHistory
+
+
+class AutoplayEngine:
+    def __init__(
+        self,
+        history: PlayHistory,
+        related_ttl: int = 6 * 60 * 60,
+        max_related: int = 1000,
+        exclude_recent: int = 25,
+        seed_pool: int = 5,
+        max_failures: int = 3,
+    ):
+        self.history = history
+        self.related_ttl = related_ttl
+        self.max_related = max_related
+        self.exclude_recent = exclude_recent
+        self.seed_pool = seed_pool
+        self.max_failures = max_failures
+
+        # YTMusic is blocking and not thread-safe, it gets one reused client on its own thread
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="ytmusic")
+        self.client = None
+        # video id -> (fetched_at, [(video id, title)])
+        self.related: "OrderedDict[str, tuple]" = OrderedDict()
+        # guild id -> (seed video id, (video id, title)) picked ahead of time
+        self.upcoming = {}
+        self.failures = {}
+
+    def _fetch_related(self, video_id: str) -> List[Tuple[str, str]]:
+        if self.client is None:
+            self.client = YTMusic()
+        # The watch playlist of a song is YouTube Music's radio for it
+        playlist = self.client.get_watch_playlist(videoId=video_id, limit=25)
+        return [
+            (track["videoId"], track.get("title") or "Unknown title")
+            for track in playlist.get("tracks", [])
+            if track.get("videoId") and track["videoId"] != video_id
+        ]
+
+    async def related_for(self, video_id: str) -> List[Tuple[str, str]]:
+        cached = self.related.get(video_id)
+        if cached and time.time() - cached[0] < self.related_ttl:
+            self.related.move_to_end(video_id)
+            return cached[1]
+
+        loop = asyncio.get_running_loop()
+        related = await loop.run_in_executor(self.executor, self._fetch_related, video_id)
+        self.related[video_id] = (time.time(), related)
+        self.related.move_to_end(video_id)
+        while len(self.related) > self.max_related:
+            self.related.popitem(last=False)
+        return related
+
+    async def pick(self, guild_id: int, seed_video_id: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        rows = await self.history.recent(guild_id, max(self.exclude_recent, self.seed_pool))
+        recent_ids = [row[0] for row in rows]
+        if seed_video_id:
+            recent_ids.insert(0, seed_video_id)
+
+        excluded = set(recent_ids[:self.exclude_recent + 1])
+        seeds = list(dict.fromkeys(recent_ids))[:self.seed_pool]
+
+        for seed in seeds:
+            try:
+                related = await self.related_for(seed)
+            except Exception as e:
+                print(f"Error fetching related songs for {seed}: {e}")
+                continue
+
+            candidates = [song for song in related if song[0] not in excluded]
+            if candidates:
+                # Pick among the closest matches so autoplay doesn't bounce between two songs
+                return random.choice(candidates[:5])
+        return None
+
+    async def prepare(self, guild_id: int, seed_video_id: str, resolve: Callable[[str], Awaitable[dict]]):
+        try:
+            song = await self.pick(guild_id, seed_video_id)
+            if not song:
+                return
+            self.upcoming[guild_id] = (seed_video_id, song)
+            await resolve(f"https://www.youtube.com/watch?v={song[0]}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error preparing autoplay for guild {guild_id}: {e}")
+
+    async def next_for(self, guild_id: int, seed_video_id: Optional[str]) -> Optional[Tuple[str, str]]:
+        if self.failures.get(guild_id, 0) >= self.max_failures:
+            return None
+        self.failures[guild_id] = self.failures.get(guild_id, 0) + 1
+
+        prepared = self.upcoming.pop(guild_id, None)
+        if prepared and prepared[0] == seed_video_id:
+            return prepared[1]
+        return await self.pick(guild_id, seed_video_id)
+
+    def started(self, guild_id: int):
+        self.failures.pop(guild_id, None)
+
+    def forget(self, guild_id: int):
+        self.upcoming.pop(guild_id, None)
+        self.failures.pop(guild_id, None)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Awaitable, Callable, List, Optional
+
+CHART_PLAYLISTS = [
+    "https://music.youtube.com/playlist?list=RDCLAK5uy_kmPRjHDECIcuVwnKsx5w4UBCp9jSEMzM",
+    "https://music.youtube.com/playlist?list=RDCLAK5uy_k8jhb5wP3rUqLOWFzVQNE_YdIcF7O4BN",
+    "https://www.youtube.com/playlist?list=PLFgquLnL59alCl_2TQvOiD5Vgm1hCaGSI",
+]
+
+CHART_SEARCHES = [
+    "ytsearch5:music charts 2024",
+    "ytsearch5:trending music now",
+    "ytsearch5:top songs 2024",
+]
+
+FALLBACK_CHART_SONGS = [
+    "Flowers Miley Cyrus",
+    "As It Was Harry Styles",
+    "Bad Habit Steve Lacy",
+    "About Damn Time Lizzo",
+    "Heat Waves Glass Animals",
+    "Stay The Kid LAROI Justin Bieber",
+    "Ghost Justin Bieber",
+    "Industry Baby Lil Nas X",
+    "Good 4 U Olivia Rodrigo",
+    "Levitating Dua Lipa"
+]
+
+CHART_PLAYLIST_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'extract_flat': True,
+    'playlist_items': '1-20',
+}
+
+
+def chart_entry(entry: dict) -> Optional[dict]:
+    if not entry or not entry.get("title") or not entry.get("id"):
+        return None
+
+    return {
+        "id": entry["id"],
+        "title": entry["title"],
+        "author": entry.get("uploader") or entry.get("channel") or "",
+        "duration": entry.get("duration") or 0,
+        "thumbnail": entry.get("thumbnail"),
+        "url": f"https://www.youtube.com/watch?v={entry['id']}",
+    }
+
+
+class ChartService:
+    def __init__(
+        self,
+        extract: Callable[[str, dict], Awaitable[dict]],
+        path: str,
+        refresh_interval: int = 6 * 60 * 60,
+        per_source: int = 15,
+    ):
+        self.extract = extract
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.per_source = per_source
+
+        self.songs: List[dict] = []
+        self.updated_at = 0.0
+        self.load()
+
+    def is_stale(self) -> bool:
+        return not self.songs or time.time() - self.updated_at > self.refresh_interval
+
+    def pick(self) -> Optional[dict]:
+        return random.choice(self.songs) if self.songs else None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.songs = data.get("songs", [])
+            self.updated_at = data.get("updated_at", 0.0)
+        except (json.JSONDecodeError, IOError, OSError):
+            self.songs = []
+            self.updated_at = 0.0
+
+    def save(self):
+        data = {"updated_at": self.updated_at, "songs": self.songs}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except (IOError, OSError) as e:
+            print(f"Error saving chart cache: {e}")
+
+    async def _collect(self, sources: List[str], seen: set) -> List[dict]:
+        songs = []
+        for source in sources:
+            try:
+                info = await self.extract(source, CHART_PLAYLIST_OPTS)
+            except Exception as e:
+                print(f"Error loading chart source {source}: {e}")
+                continue
+
+            added = 0
+            for entry in (info or {}).get("entries") or []:
+                song = chart_entry(entry)
+                if song and song["id"] not in seen:
+                    seen.add(song["id"])
+                    songs.append(song)
+                    added += 1
+                    if added >= self.per_source:
+                        break
+        return songs
+
+    async def refresh(self) -> bool:
+        seen = set()
+        songs = await self._collect(CHART_PLAYLISTS, seen)
+        if not songs:
+            songs = await self._collect(CHART_SEARCHES, seen)
+        if not songs:
+            # Keep serving the last good list rather than nothing
+            return False
+
+        self.songs = songs
+        self.updated_at = time.time()
+        await asyncio.to_thread(self.save)
+        return True
+
+    async def run(self):
+        while True:
+            if self.is_stale():
+                try:
+                    await self.refresh()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Error refreshing charts: {e}")
+
+            wait = self.refresh_interval - (time.time() - self.updated_at)
+            await asyncio.sleep(max(300, wait))
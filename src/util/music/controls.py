@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+from typing import Callable, Optional, Tuple
+
+import discord
+
+from util.outbound import scheduler
+
+
+class ControlsMessage:
+    def __init__(
+        self,
+        bot,
+        path: str,
+        channel_id: Optional[int],
+        build: Callable[[], Tuple[discord.Embed, discord.ui.View]],
+        debounce: float = 3,
+        title: str = "Music Controls",
+    ):
+        self.bot = bot
+        self.path = path
+        # Config values are strings, the stored id and get_channel need an int
+        self.channel_id = int(channel_id) if channel_id else None
+        self.build = build
+        self.debounce = debounce
+        self.title = title
+
+        self.message_id = self.load()
+        self.dirty = False
+        self.task: Optional[asyncio.Task] = None
+
+        self.requests = 0
+        self.coalesced = 0
+        self.edits = 0
+        self.reposts = 0
+
+    def load(self) -> Optional[int]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError, OSError) as e:
+            print(f"Error loading controls message: {e}")
+            return None
+        # A different channel configured since, the stored message is not there
+        if data.get("channel_id") != self.channel_id:
+            return None
+        return data.get("message_id")
+
+    def save(self):
+        data = {"channel_id": self.channel_id, "message_id": self.message_id}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except (IOError, OSError) as e:
+            print(f"Error saving controls message: {e}")
+
+    def request(self) -> asyncio.Task:
+        self.requests += 1
+        self.dirty = True
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        else:
+            # A burst of disconnects ends in one update
+            self.coalesced += 1
+        return self.task
+
+    async def _run(self):
+        await asyncio.sleep(self.debounce)
+        while self.dirty:
+            self.dirty = False
+            try:
+                await self.update()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error updating controls message: {e}")
+
+    async def _channel(self):
+        return self.bot.get_channel(self.channel_id) or await self.bot.fetch_channel(self.channel_id)
+
+    async def _adopt(self, channel) -> Optional[int]:
+        # Only before the first id is stored, picks up the message an older version posted
+        async for message in channel.history(limit=100):
+            if (
+                message.author == self.bot.user and
+                message.embeds and
+                message.embeds[0].title and
+                self.title in message.embeds[0].title
+            ):
+                return message.id
+        return None
+
+    async def update(self):
+        if self.channel_id is None:
+            print("No music controls channel configured, skipping the controls message")
+            return
+        channel = await self._channel()
+        if channel is None:
+            return
+        embed, view = self.build()
+
+        if self.message_id is None:
+            self.message_id = await self._adopt(channel)
+            if self.message_id is not None:
+                await asyncio.to_thread(self.save)
+
+        if self.message_id is not None:
+            try:
+                await scheduler.edit(channel.get_partial_message(self.message_id), embed=embed, view=view)
+                self.edits += 1
+                return
+            except discord.NotFound:
+                # Deleted by someone, post a new one below
+                pass
+
+        message = await scheduler.send(channel, embed=embed, view=view)
+        self.message_id = message.id
+        self.reposts += 1
+        await asyncio.to_thread(self.save)
+
+    def stats(self) -> dict:
+        return {
+            "message_id": self.message_id,
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "edits": self.edits,
+            "reposts": self.reposts,
+        }
@@ -0,0 +1,73 @@
+import time
+from typing import Dict, Iterable, Tuple
+
+import discord
+
+
+class EmbedTemplates:
+    def __init__(self):
+        # name -> embed sent as is, never mutate these
+        self.constants: Dict[str, discord.Embed] = {}
+
+        self.reused = 0
+
+    def register_constant(
+        self,
+        name: str,
+        title: str,
+        description: str = "",
+        *,
+        color: int = 0x5865F2,
+        fields: Iterable[Tuple[str, str, bool]] = (),
+    ) -> discord.Embed:
+        embed = discord.Embed(title=title, description=description, color=color)
+        for field_name, value, inline in fields:
+            embed.add_field(name=field_name, value=value, inline=inline)
+        self.constants[name] = embed
+        return embed
+
+    def constant(self, name: str) -> discord.Embed:
+        self.reused += 1
+        return self.constants[name]
+
+    def stats(self) -> dict:
+        return {
+            "constants": len(self.constants),
+            "reused": self.reused,
+        }
+
+
+def benchmark(rounds: int = 20000) -> Dict[str, float]:
+    # Microseconds to get one reply embed, run with: python -m util.music.embeds
+    templates = EmbedTemplates()
+    templates.register_constant(
+        "wrong_channel",
+        "Wrong voice channel",
+        "You must be in the same voice channel as the bot.",
+        color=0xe74c3c,
+    )
+
+    def constant_scratch():
+        embed = discord.Embed(
+            title="Wrong voice channel",
+            description="You must be in the same voice channel as the bot.",
+            color=0xe74c3c,
+        )
+        embed.timestamp = discord.utils.utcnow()
+        return embed
+
+    def constant_cached():
+        return templates.constant("wrong_channel")
+
+    results = {}
+    for build in (constant_scratch, constant_cached):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            build()
+        results[build.__name__] = (time.perf_counter() - started) / rounds * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    for label, micros in benchmark().items():
+        print(f"{label:>18}: {micros:.2f} us")
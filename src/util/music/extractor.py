@@ -0,0 +1,172 @@
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import threading
+from typing import Optional
+
+import yt_dlp
+
+# Heavy parts of a yt-dlp info dict that the music cog never reads
+DROPPED_KEYS = (
+    "formats",
+    "thumbnails",
+    "subtitles",
+    "automatic_captions",
+    "heatmap",
+    "chapters",
+    "requested_formats",
+    "requested_downloads",
+    "description",
+    "tags",
+    "categories",
+)
+
+# One YoutubeDL per (thread/process, options), YoutubeDL is not thread-safe
+_local = threading.local()
+
+
+def _options_key(opts: dict) -> str:
+    return json.dumps(opts, sort_keys=True, default=str)
+
+
+def _get_ydl(opts: dict) -> yt_dlp.YoutubeDL:
+    instances = getattr(_local, "instances", None)
+    if instances is None:
+        instances = _local.instances = {}
+
+    key = _options_key(opts)
+    ydl = instances.get(key)
+    if ydl is None:
+        ydl = instances[key] = yt_dlp.YoutubeDL(opts)
+    return ydl
+
+
+def trim_info(info):
+    if not isinstance(info, dict):
+        return info
+
+    trimmed = {}
+    thumbnails = info.get("thumbnails")
+    if not info.get("thumbnail") and thumbnails:
+        trimmed["thumbnail"] = thumbnails[-1].get("url")
+
+    for key, value in info.items():
+        # Private keys can hold callables (e.g. __post_extractor) that don't pickle
+        if key in DROPPED_KEYS or (key.startswith("_") and key != "_type"):
+            continue
+        if key == "entries" and value is not None:
+            value = [trim_info(entry) for entry in value]
+        trimmed[key] = value
+    return trimmed
+
+
+def extract(url: str, opts: dict) -> Optional[dict]:
+    return trim_info(_get_ydl(opts).extract_info(url, download=False))
+
+
+def _warm_worker(opts_list):
+    for opts in opts_list:
+        _get_ydl(opts)
+
+
+class ExtractionBackend:
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: int = 4,
+        max_in_flight: int = 8,
+        timeout: Optional[float] = 30,
+        warm_options: tuple = (),
+    ):
+        self.mode = mode
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self._semaphore = None
+
+        if mode == "process":
+            # spawn keeps the workers clear of the bot's event loop and voice threads
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+                initargs=(list(warm_options),),
+            )
+        elif mode == "thread":
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="yt-dlp",
+                initializer=_warm_worker,
+                initargs=(list(warm_options),),
+            )
+        else:
+            raise ValueError(f"Unknown extractor mode: {mode}")
+
+        self.in_flight = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop, not the import-time one
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    async def extract(self, url: str, opts: dict, timeout: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.timeout
+        deadline = None if timeout is None else loop.time() + timeout
+        try:
+            # Waiting for a slot counts against the timeout, hung workers can hold all of them
+            await asyncio.wait_for(self.semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        self.in_flight += 1
+        remaining = None if deadline is None else deadline - loop.time()
+        if remaining is not None and remaining <= 0:
+            self._release()
+            self.timeouts += 1
+            raise asyncio.TimeoutError()
+        try:
+            future = self.executor.submit(extract, url, opts)
+        except BaseException:
+            self._release()
+            raise
+        # The slot stays taken until the worker is really done, a timeout only stops the wait
+        future.add_done_callback(lambda _: self._release_threadsafe(loop))
+        try:
+            info = await asyncio.wait_for(asyncio.wrap_future(future), remaining)
+            self.completed += 1
+            return info
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+
+    def _release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop):
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # Loop already closed, nothing is waiting on the slot anymore
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
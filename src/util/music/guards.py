@@ -0,0 +1,107 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import discord
+from discord import app_commands
+
+# Guards, checked in the order a command lists them
+MUTED = "muted"
+IN_VOICE = "in_voice"
+SAME_CHANNEL = "same_channel"
+PLAYING = "playing"
+
+ERROR_COLOR = 0xe74c3c
+
+
+class GuardRejected(app_commands.CheckFailure):
+    def __init__(self, guard: str):
+        super().__init__(f"Rejected by the {guard} guard")
+        self.guard = guard
+
+
+def guarded(*names: str):
+    # The cog's MusicGuards answers the interaction, the command body never runs
+    async def predicate(interaction: discord.Interaction) -> bool:
+        guards = interaction.command.binding.guards
+        guard = await guards.reject(interaction, names)
+        if guard is not None:
+            raise GuardRejected(guard)
+        return True
+
+    return app_commands.check(predicate)
+
+
+class MusicGuards:
+    def __init__(self, mutes, embeds):
+        self.mutes = mutes
+        # Fixed answers are constants of the cog's EmbedTemplates, named after their guard
+        self.embeds = embeds
+        self.checks = {
+            MUTED: self._muted,
+            IN_VOICE: self._in_voice,
+            SAME_CHANNEL: self._same_channel,
+            PLAYING: self._playing,
+        }
+
+        self.passed = 0
+        self.rejections: Dict[str, int] = {name: 0 for name in self.checks}
+
+    def _muted(self, interaction: discord.Interaction) -> Optional[discord.Embed]:
+        record = self.mutes.get(interaction.user.id)
+        if record is None:
+            return None
+        end_time = self.mutes.end_time(interaction.user.id)
+        remaining_minutes = max(0, int((end_time - datetime.now()).total_seconds() / 60))
+        embed = discord.Embed(
+            title="Muted",
+            description="You cannot use music commands right now.",
+            color=ERROR_COLOR,
+        )
+        embed.add_field(name="Time remaining", value=f"```\n{remaining_minutes} minutes\n```", inline=True)
+        embed.add_field(name="Ends at", value=f"```\n{end_time.strftime('%H:%M:%S')}\n```", inline=True)
+        embed.add_field(name="By", value=f"```\n{record['timeout_by_name']}\n```", inline=True)
+        return embed
+
+    def _in_voice(self, interaction: discord.Interaction) -> Optional[discord.Embed]:
+        if interaction.user.voice:
+            return None
+        return self.embeds.constant(IN_VOICE)
+
+    def _same_channel(self, interaction: discord.Interaction) -> Optional[discord.Embed]:
+        voice_client = interaction.guild.voice_client
+        if not voice_client or not voice_client.channel:
+            return None
+        voice = interaction.user.voice
+        if voice and voice.channel == voice_client.channel:
+            return None
+        return self.embeds.constant(SAME_CHANNEL)
+
+    def _playing(self, interaction: discord.Interaction) -> Optional[discord.Embed]:
+        voice_client = interaction.guild.voice_client
+        if voice_client and (voice_client.is_playing() or voice_client.is_paused()):
+            return None
+        return self.embeds.constant(PLAYING)
+
+    def check(self, interaction: discord.Interaction, names: Iterable[str]):
+        # Only cache and in-memory state, nothing here talks to Discord
+        for name in names:
+            embed = self.checks[name](interaction)
+            if embed is not None:
+                return name, embed
+        return None
+
+    async def reject(self, interaction: discord.Interaction, names: Iterable[str]) -> Optional[str]:
+        failed = self.check(interaction, names)
+        if failed is None:
+            self.passed += 1
+            return None
+        name, embed = failed
+        self.rejections[name] += 1
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return name
+
+    def stats(self) -> dict:
+        return {
+            "passed": self.passed,
+            "rejections": dict(self.rejections),
+        }
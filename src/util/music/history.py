@@ -0,0 +1,96 @@
+import asyncio
+import concurrent.futures
+import os
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    requester_id INTEGER,
+    video_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plays_guild_time ON plays (guild_id, played_at);
+CREATE INDEX IF NOT EXISTS plays_guild_video ON plays (guild_id, video_id);
+CREATE INDEX IF NOT EXISTS plays_requester ON plays (requester_id, played_at);
+CREATE INDEX IF NOT EXISTS plays_time ON plays (played_at);
+"""
+
+
+class PlayHistory:
+    def __init__(self, path: str):
+        self.path = path
+        # sqlite connections stay on the thread that made them, so all access goes through one worker
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="play-history")
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def _record(self, guild_id, requester_id, video_id, title, played_at):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO plays (guild_id, requester_id, video_id, title, played_at) VALUES (?, ?, ?, ?, ?)",
+                (guild_id, requester_id, video_id, title, played_at),
+            )
+
+    async def record(self, guild_id: int, requester_id: Optional[int], video_id: str, title: str, played_at: Optional[float] = None):
+        await self._run(self._record, guild_id, requester_id, video_id, title, played_at or time.time())
+
+    def _recent(self, guild_id, limit):
+        rows = self._connect().execute(
+            "SELECT video_id, title, requester_id, played_at FROM plays WHERE guild_id = ? ORDER BY played_at DESC LIMIT ?",
+            (guild_id, limit),
+        ).fetchall()
+        return rows
+
+    async def recent(self, guild_id: int, limit: int = 1000) -> List[Tuple[str, str, Optional[int], float]]:
+        return await self._run(self._recent, guild_id, limit)
+
+    def _totals(self):
+        return self._connect().execute(
+            "SELECT guild_id, requester_id, video_id, MAX(title), COUNT(*) FROM plays "
+            "GROUP BY guild_id, requester_id, video_id"
+        ).fetchall()
+
+    async def totals(self):
+        return await self._run(self._totals)
+
+    def _since(self, played_after):
+        return self._connect().execute(
+            "SELECT guild_id, requester_id, video_id, title, played_at FROM plays "
+            "WHERE played_at >= ? ORDER BY played_at",
+            (played_after,),
+        ).fetchall()
+
+    async def since(self, played_after: float):
+        return await self._run(self._since, played_after)
+
+    async def last_played(self, guild_id: int) -> Optional[str]:
+        rows = await self.recent(guild_id, 1)
+        return rows[0][0] if rows else None
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def close(self):
+        # Queued writes finish first, without holding up the event loop
+        await self._run(self._close)
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict
+
+
+class IdleReaper:
+    def __init__(self, grace: float, on_idle: Callable[[int], Awaitable[bool]]):
+        self.grace = grace
+        # Re-checks the channel and disconnects, returns whether it did
+        self.on_idle = on_idle
+
+        # guild id -> pending disconnect of that guild's voice client
+        self.timers: Dict[int, asyncio.TimerHandle] = {}
+        # guild id -> when the last listener left
+        self.empty_since: Dict[int, float] = {}
+        self.tasks = set()
+
+        self.armed = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.reaped = 0
+        self.kept = 0
+
+    def arm(self, guild_id: int):
+        if guild_id in self.timers:
+            # Already counting down, more leaves don't restart the grace period
+            self.coalesced += 1
+            return
+        self.empty_since[guild_id] = time.monotonic()
+        loop = asyncio.get_running_loop()
+        self.timers[guild_id] = loop.call_later(self.grace, self._fire, guild_id)
+        self.armed += 1
+
+    def cancel(self, guild_id: int):
+        timer = self.timers.pop(guild_id, None)
+        self.empty_since.pop(guild_id, None)
+        if timer is not None:
+            timer.cancel()
+            self.cancelled += 1
+
+    def _fire(self, guild_id: int):
+        self.timers.pop(guild_id, None)
+        self.empty_since.pop(guild_id, None)
+        task = asyncio.create_task(self._reap(guild_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _reap(self, guild_id: int):
+        try:
+            if await self.on_idle(guild_id):
+                self.reaped += 1
+            else:
+                self.kept += 1
+        except Exception as e:
+            print(f"Error disconnecting idle voice client in guild {guild_id}: {e}")
+
+    def close(self):
+        for timer in self.timers.values():
+            timer.cancel()
+        self.timers.clear()
+        self.empty_since.clear()
+        for task in self.tasks:
+            task.cancel()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "pending": len(self.timers),
+            "armed": self.armed,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "reaped": self.reaped,
+            "kept": self.kept,
+            "longest_idle": max((now - since for since in self.empty_since.values()), default=0.0),
+        }
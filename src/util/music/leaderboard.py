@@ -0,0 +1,148 @@
+import bisect
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WINDOWS = {
+    "24h": 24 * 60 * 60,
+    "7d": 7 * 24 * 60 * 60,
+    "all": None,
+}
+
+WINDOW_LABELS = {
+    "24h": "Last 24 hours",
+    "7d": "Last 7 days",
+    "all": "All time",
+}
+
+
+class CountIndex:
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        # count -> keys with that count (dict keeps insertion order, oldest first)
+        self.buckets: Dict[int, Dict[str, None]] = {}
+        # sorted counts that currently have a bucket
+        self.levels: List[int] = []
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _remove_from_bucket(self, key: str, count: int):
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            del self.levels[bisect.bisect_left(self.levels, count)]
+
+    def _add_to_bucket(self, key: str, count: int):
+        bucket = self.buckets.get(count)
+        if bucket is None:
+            bucket = self.buckets[count] = {}
+            bisect.insort(self.levels, count)
+        bucket[key] = None
+
+    def add(self, key: str, delta: int = 1):
+        old = self.counts.get(key, 0)
+        new = max(0, old + delta)
+        if new == old:
+            return
+
+        if old:
+            self._remove_from_bucket(key, old)
+        if new:
+            self.counts[key] = new
+            self._add_to_bucket(key, new)
+        else:
+            del self.counts[key]
+        self.total += new - old
+
+    def top(self, limit: int = 10) -> List[Tuple[str, int]]:
+        result = []
+        for count in reversed(self.levels):
+            for key in self.buckets[count]:
+                result.append((key, count))
+                if len(result) >= limit:
+                    return result
+        return result
+
+
+class Leaderboard:
+    def __init__(self, windows: Optional[dict] = None):
+        self.windows = windows or WINDOWS
+        # (window, guild_id, user_id or None) -> CountIndex
+        self.indexes: Dict[tuple, CountIndex] = {}
+        # (window, guild_id) -> deque of (played_at, user_id, video_id) still inside the window
+        self.events: Dict[tuple, deque] = {}
+        self.titles: Dict[str, str] = {}
+
+    def _index(self, window: str, guild_id: int, user_id: Optional[int] = None) -> CountIndex:
+        key = (window, guild_id, user_id)
+        index = self.indexes.get(key)
+        if index is None:
+            index = self.indexes[key] = CountIndex()
+        return index
+
+    def _bump(self, window, guild_id, user_id, video_id, delta):
+        self._index(window, guild_id).add(video_id, delta)
+        if user_id is not None:
+            self._index(window, guild_id, user_id).add(video_id, delta)
+
+    def _expire(self, guild_id: int, now: float):
+        for window, length in self.windows.items():
+            if length is None:
+                continue
+            events = self.events.get((window, guild_id))
+            cutoff = now - length
+            while events and events[0][0] < cutoff:
+                _played_at, user_id, video_id = events.popleft()
+                self._bump(window, guild_id, user_id, video_id, -1)
+
+    def record(self, guild_id: int, user_id: Optional[int], video_id: str, title: str, played_at: Optional[float] = None):
+        played_at = played_at or time.time()
+        now = time.time()
+        self.titles[video_id] = title
+
+        for window, length in self.windows.items():
+            if length is not None:
+                if played_at < now - length:
+                    continue
+                events = self.events.setdefault((window, guild_id), deque())
+                events.append((played_at, user_id, video_id))
+            self._bump(window, guild_id, user_id, video_id, 1)
+
+        self._expire(guild_id, now)
+
+    def load_totals(self, rows: Iterable[tuple]):
+        # rows: (guild_id, user_id, video_id, title, plays) for the all-time index
+        for guild_id, user_id, video_id, title, plays in rows:
+            self.titles[video_id] = title
+            self._bump("all", guild_id, user_id, video_id, plays)
+
+    def load_recent(self, rows: Iterable[tuple]):
+        # rows: (guild_id, user_id, video_id, title, played_at), oldest first
+        now = time.time()
+        for guild_id, user_id, video_id, title, played_at in rows:
+            self.titles[video_id] = title
+            for window, length in self.windows.items():
+                if length is None or played_at < now - length:
+                    continue
+                self.events.setdefault((window, guild_id), deque()).append((played_at, user_id, video_id))
+                self._bump(window, guild_id, user_id, video_id, 1)
+
+    def top(self, guild_id: int, window: str = "all", user_id: Optional[int] = None, limit: int = 10) -> List[Tuple[str, str, int]]:
+        self._expire(guild_id, time.time())
+        index = self.indexes.get((window, guild_id, user_id))
+        if not index:
+            return []
+        return [(video_id, self.titles.get(video_id, video_id), count) for video_id, count in index.top(limit)]
+
+    def plays(self, guild_id: int, video_id: str, window: str = "all") -> int:
+        index = self.indexes.get((window, guild_id, None))
+        return index.counts.get(video_id, 0) if index else 0
+
+    def summary(self, guild_id: int, window: str = "all", user_id: Optional[int] = None) -> Tuple[int, int]:
+        index = self.indexes.get((window, guild_id, user_id))
+        if not index:
+            return 0, 0
+        return len(index), index.total
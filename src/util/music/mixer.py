@@ -0,0 +1,249 @@
+import array
+import threading
+from typing import Callable
+
+import discord
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# 20 ms of 48 kHz stereo s16le, what discord.py reads per packet
+FRAME_MS = 20
+FRAME_SIZE = discord.opus.Encoder.FRAME_SIZE
+SILENCE = b"\x00" * FRAME_SIZE
+
+
+def mix_frames(fading_out: bytes, fading_in: bytes, gain: float) -> bytes:
+    # gain goes 0 -> 1 over the fade, the outgoing track gets the rest
+    if len(fading_out) < FRAME_SIZE:
+        fading_out = fading_out.ljust(FRAME_SIZE, b"\x00")
+    if len(fading_in) < FRAME_SIZE:
+        fading_in = fading_in.ljust(FRAME_SIZE, b"\x00")
+
+    if numpy is not None:
+        out = numpy.frombuffer(fading_out, dtype=numpy.int16).astype(numpy.float32)
+        inc = numpy.frombuffer(fading_in, dtype=numpy.int16).astype(numpy.float32)
+        mixed = out * (1.0 - gain) + inc * gain
+        return numpy.clip(mixed, -32768, 32767).astype(numpy.int16).tobytes()
+
+    out = array.array("h", fading_out)
+    inc = array.array("h", fading_in)
+    keep = 1.0 - gain
+    mixed = array.array("h", (
+        max(-32768, min(32767, int(a * keep + b * gain))) for a, b in zip(out, inc)
+    ))
+    return mixed.tobytes()
+
+
+class MixerSource(discord.AudioSource):
+    def __init__(
+        self,
+        crossfade_seconds: float,
+        on_switch: Callable[[object], None],
+        version: Callable[[], int],
+    ):
+        self.crossfade_frames = int(crossfade_seconds * 1000 / FRAME_MS)
+        self.on_switch = on_switch
+        self.version = version
+
+        self.lock = threading.Lock()
+        self.current = None
+        self.current_track = None
+        self.frames_left = None
+        # Frames of the current track played so far, plus where it was started from
+        self.frames_played = 0
+        self.offset = 0.0
+        # (queue version, track, source) handed over by the prefetcher
+        self.upcoming = None
+        self.fade_frame = 0
+
+        # Sources swapped out from the event loop, cleaned up by the reader so none is killed mid-read
+        self.retired = []
+
+        self.switches = 0
+        self.mixed_frames = 0
+
+    def is_opus(self) -> bool:
+        return False
+
+    @property
+    def position(self) -> float:
+        return self.offset + self.frames_played * FRAME_MS / 1000
+
+    def start(self, track, source: discord.AudioSource, offset: float = 0.0):
+        with self.lock:
+            self.current = source
+            self.current_track = track
+            self._set_length(track, offset)
+
+    def seek(self, source: discord.AudioSource, offset: float):
+        with self.lock:
+            self._retire(self.current)
+            self.current = source
+            self._set_length(self.current_track, offset)
+            self.fade_frame = 0
+
+    def _set_length(self, track, offset: float = 0.0):
+        duration = int(getattr(track, "duration", 0) or 0)
+        self.frames_left = int((duration - offset) * 1000 // FRAME_MS) if duration else None
+        self.frames_played = 0
+        self.offset = offset
+
+    def offer(self, version: int, track, source: discord.AudioSource) -> bool:
+        with self.lock:
+            if self.current is None:
+                return False
+            if self.upcoming:
+                self._retire(self.upcoming[2])
+            self.upcoming = (version, track, source)
+        return True
+
+    def withdraw(self):
+        with self.lock:
+            if self.upcoming:
+                self._retire(self.upcoming[2])
+            self.upcoming = None
+            self.fade_frame = 0
+
+    def _retire(self, source):
+        if source:
+            self.retired.append(source)
+
+    def _cleanup_retired(self):
+        with self.lock:
+            retired, self.retired = self.retired, []
+        for source in retired:
+            source.cleanup()
+
+    def _take_upcoming(self):
+        # Under the lock, the stale source comes back for the caller to clean up outside it
+        upcoming, self.upcoming = self.upcoming, None
+        if upcoming and upcoming[0] != self.version():
+            # The queue was shuffled or cleared after this was prepared
+            return None, upcoming[2]
+        return upcoming, None
+
+    def _switch(self, upcoming):
+        old = self.current
+        _version, track, source = upcoming
+        self.current = source
+        self.current_track = track
+        self._set_length(track)
+        if self.frames_left is not None:
+            # Part of the new track was already heard during the fade
+            self.frames_left -= self.fade_frame
+        self.frames_played = self.fade_frame
+        self.fade_frame = 0
+        self.switches += 1
+        return old
+
+    def _finish_switch(self, old, stale, track):
+        for source in (old, stale):
+            if source:
+                source.cleanup()
+        if track is not None:
+            self.on_switch(track)
+
+    def read(self) -> bytes:
+        # The lock only guards the references, FFmpeg reads and cleanups can block and run outside it
+        self._cleanup_retired()
+        with self.lock:
+            current = self.current
+        if current is None:
+            return b""
+
+        frame = current.read()
+        incoming = None
+        with self.lock:
+            if self.current is not current:
+                # Seeked or cleaned up during the read, the new source starts with the next frame
+                return SILENCE if self.current is not None else b""
+
+            self.frames_played += 1
+            if self.frames_left is not None:
+                self.frames_left -= 1
+
+            fading = (
+                self.upcoming is not None
+                and self.crossfade_frames
+                and self.frames_left is not None
+                and self.frames_left < self.crossfade_frames
+            )
+            if fading and self.upcoming[0] != self.version():
+                fading = False
+
+            if not frame:
+                # Current track ran out, carry on with the next one in the same frame
+                upcoming, stale = self._take_upcoming()
+                old = self._switch(upcoming) if upcoming else None
+                next_source = self.current if upcoming else None
+            elif fading:
+                incoming = self.upcoming[2]
+                self.fade_frame += 1
+                self.mixed_frames += 1
+                gain = min(1.0, self.fade_frame / self.crossfade_frames)
+
+        if not frame:
+            self._finish_switch(old, stale, upcoming[1] if upcoming else None)
+            if next_source is None:
+                return b""
+            return next_source.read() or SILENCE
+
+        if incoming is None:
+            return frame
+
+        mixed = mix_frames(frame, incoming.read(), gain)
+        with self.lock:
+            if self.current is not current or self.frames_left > 0:
+                return mixed
+            # Fade done, the incoming track already played fade_frame frames
+            upcoming, stale = self._take_upcoming()
+            old = self._switch(upcoming) if upcoming else None
+        self._finish_switch(old, stale, upcoming[1] if upcoming else None)
+        return mixed
+
+    def cleanup(self):
+        with self.lock:
+            current, self.current = self.current, None
+            upcoming, self.upcoming = self.upcoming, None
+            retired, self.retired = self.retired, []
+        if current:
+            current.cleanup()
+        if upcoming:
+            upcoming[2].cleanup()
+        for source in retired:
+            source.cleanup()
+
+    def stats(self) -> dict:
+        return {
+            "position": self.position,
+            "switches": self.switches,
+            "mixed_frames": self.mixed_frames,
+            "numpy": numpy is not None,
+        }
+
+
+class TrackedSource(discord.AudioSource):
+    # Counts frames handed to the voice client so the playback position survives pauses
+    def __init__(self, source: discord.AudioSource, offset: float = 0.0):
+        self.source = source
+        self.offset = offset
+        self.frames_played = 0
+
+    @property
+    def position(self) -> float:
+        return self.offset + self.frames_played * FRAME_MS / 1000
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def read(self) -> bytes:
+        data = self.source.read()
+        if data:
+            self.frames_played += 1
+        return data
+
+    def cleanup(self):
+        self.source.cleanup()
@@ -0,0 +1,162 @@
+import asyncio
+import heapq
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class MuteStore:
+    def __init__(self, path: str, debounce: float = 2):
+        self.path = path
+        self.debounce = debounce
+
+        # user id -> record as stored in the file, plus its parsed end time
+        self.mutes: Dict[int, dict] = {}
+        self.ends: Dict[int, datetime] = {}
+        # (end timestamp, user id), entries of unmuted or re-muted users are skipped when popped
+        self.expiries = []
+        self.wakeup: Optional[asyncio.TimerHandle] = None
+        self.wakeup_at: Optional[float] = None
+
+        self.dirty = False
+        self.write_task: Optional[asyncio.Task] = None
+
+        self.checks = 0
+        self.expired = 0
+        self.writes = 0
+
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError, OSError) as e:
+            print(f"Error loading music mutes: {e}")
+            return
+
+        now = time.time()
+        for user_key, record in data.items():
+            try:
+                end = datetime.fromisoformat(record["end_time"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if end.timestamp() <= now:
+                # Ran out while the bot was offline, dropped on the next write
+                self.dirty = True
+                continue
+            self._add(int(user_key), record, end)
+
+    def _add(self, user_id: int, record: dict, end: datetime):
+        self.mutes[user_id] = record
+        self.ends[user_id] = end
+        heapq.heappush(self.expiries, (end.timestamp(), user_id))
+
+    def start(self):
+        self._schedule()
+        if self.dirty:
+            self._changed()
+
+    def get(self, user_id: int) -> Optional[dict]:
+        self.checks += 1
+        record = self.mutes.get(user_id)
+        if record is None:
+            return None
+        if self.ends[user_id].timestamp() <= time.time():
+            # The timer has not fired yet, the mute is over anyway
+            self._expire(user_id)
+            return None
+        return record
+
+    def end_time(self, user_id: int) -> Optional[datetime]:
+        return self.ends.get(user_id)
+
+    def mute(self, user_id: int, record: dict):
+        self._add(user_id, record, datetime.fromisoformat(record["end_time"]))
+        self._schedule()
+        self._changed()
+
+    def unmute(self, user_id: int) -> bool:
+        if self.get(user_id) is None:
+            return False
+        del self.mutes[user_id]
+        del self.ends[user_id]
+        self._changed()
+        return True
+
+    def _expire(self, user_id: int):
+        self.mutes.pop(user_id, None)
+        self.ends.pop(user_id, None)
+        self.expired += 1
+        self._changed()
+
+    def _schedule(self):
+        if not self.expiries:
+            return
+        at = self.expiries[0][0]
+        if self.wakeup is not None:
+            if self.wakeup_at <= at:
+                return
+            self.wakeup.cancel()
+        loop = asyncio.get_running_loop()
+        self.wakeup = loop.call_later(max(0.0, at - time.time()), self._on_wakeup)
+        self.wakeup_at = at
+
+    def _on_wakeup(self):
+        self.wakeup = None
+        now = time.time()
+        while self.expiries and self.expiries[0][0] <= now:
+            at, user_id = heapq.heappop(self.expiries)
+            end = self.ends.get(user_id)
+            if end is not None and end.timestamp() == at:
+                self._expire(user_id)
+        self._schedule()
+
+    def _changed(self):
+        self.dirty = True
+        if self.write_task is None or self.write_task.done():
+            self.write_task = asyncio.create_task(self._write_behind())
+
+    async def _write_behind(self):
+        # Changes in the debounce window end up in one write
+        await asyncio.sleep(self.debounce)
+        while self.dirty:
+            self.dirty = False
+            await asyncio.to_thread(self.write, self.snapshot())
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {str(user_id): dict(record) for user_id, record in self.mutes.items()}
+
+    def write(self, data: Dict[str, dict]):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self.writes += 1
+        except (IOError, OSError) as e:
+            print(f"Error saving music mutes: {e}")
+
+    def close(self):
+        if self.wakeup is not None:
+            self.wakeup.cancel()
+            self.wakeup = None
+        if self.write_task and not self.write_task.done():
+            self.write_task.cancel()
+        if self.dirty:
+            self.dirty = False
+            self.write(self.snapshot())
+
+    def stats(self) -> dict:
+        return {
+            "muted": len(self.mutes),
+            "checks": self.checks,
+            "expired": self.expired,
+            "writes": self.writes,
+            "pending_expiries": len(self.expiries),
+        }
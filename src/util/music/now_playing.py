@@ -0,0 +1,140 @@
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+import discord
+
+from util.outbound import scheduler
+
+PROGRESS_FIELD = "Progress"
+
+
+def format_time(seconds: float) -> str:
+    # Shared with the music cog, minutes keep counting past the hour
+    m, s = divmod(int(seconds), 60)
+    return f"{m:02}:{s:02}"
+
+
+def progress_bar(position: float, duration: float, width: int = 16) -> str:
+    if not duration:
+        return f"🔴 {format_time(position)}"
+    filled = min(width - 1, int(width * position / duration))
+    bar = "▬" * filled + "🔘" + "▬" * (width - filled - 1)
+    return f"{bar} {format_time(min(position, duration))} / {format_time(duration)}"
+
+
+class NowPlaying:
+    __slots__ = ("message", "embed", "duration", "position", "rendered", "finished")
+
+    def __init__(self, message: discord.Message, embed: discord.Embed, duration: int, position: Callable[[], float]):
+        self.message = message
+        self.embed = embed
+        self.duration = duration
+        self.position = position
+        # The message is sent with the bar at the start already
+        self.rendered = progress_bar(position(), duration)
+        self.finished = False
+
+
+class NowPlayingTicker:
+    def __init__(self, interval: float = 15, finished_footer: Optional[Callable[[discord.Embed], None]] = None):
+        self.interval = interval
+        self.finished_footer = finished_footer
+        # guild id -> message being kept up to date, plus finished ones waiting for their last edit
+        self.active: Dict[int, NowPlaying] = {}
+        self.finishing = []
+        self.wakeup = asyncio.Event()
+
+        self.edits = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def start(self, guild_id: int, message: discord.Message, embed: discord.Embed, duration: int, position: Callable[[], float]):
+        self.finish(guild_id)
+        self.active[guild_id] = NowPlaying(message, embed, duration, position)
+        self.wakeup.set()
+
+    def finish(self, guild_id: int):
+        entry = self.active.pop(guild_id, None)
+        if entry:
+            entry.finished = True
+            self.finishing.append(entry)
+            self.wakeup.set()
+
+    def _render(self, entry: NowPlaying) -> Optional[discord.Embed]:
+        embed = entry.embed
+        if entry.finished:
+            if self.finished_footer:
+                self.finished_footer(embed)
+            embed.color = 0x95a5a6
+            index = self._field_index(embed)
+            if index is not None:
+                embed.remove_field(index)
+            return embed
+
+        bar = progress_bar(entry.position(), entry.duration)
+        if bar == entry.rendered:
+            # Paused or unchanged, no edit needed
+            return None
+        entry.rendered = bar
+
+        index = self._field_index(embed)
+        if index is None:
+            embed.add_field(name=PROGRESS_FIELD, value=bar, inline=False)
+        else:
+            embed.set_field_at(index, name=PROGRESS_FIELD, value=bar, inline=False)
+        return embed
+
+    def _field_index(self, embed: discord.Embed) -> Optional[int]:
+        for index, field in enumerate(embed.fields):
+            if field.name == PROGRESS_FIELD:
+                return index
+        return None
+
+    async def _edit(self, entry: NowPlaying):
+        embed = self._render(entry)
+        if embed is None:
+            self.skipped += 1
+            return
+        try:
+            # Low priority and coalesced, a reply someone waits for goes out first
+            await scheduler.edit(entry.message, embed=embed)
+            self.edits += 1
+        except discord.HTTPException as e:
+            self.failed += 1
+            if e.status == 404:
+                # Message is gone, stop updating it
+                entry.finished = True
+
+    async def tick(self):
+        finishing, self.finishing = self.finishing, []
+        # One edit per message per tick, finished messages get their last one
+        entries = finishing + list(self.active.values())
+        await asyncio.gather(*(self._edit(entry) for entry in entries), return_exceptions=True)
+
+        for guild_id, entry in list(self.active.items()):
+            if entry.finished:
+                del self.active[guild_id]
+
+    async def run(self):
+        while True:
+            if not self.active and not self.finishing:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+
+            started = time.monotonic()
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error updating now playing messages: {e}")
+            await asyncio.sleep(max(1, self.interval - (time.monotonic() - started)))
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self.active),
+            "edits": self.edits,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
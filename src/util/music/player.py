@@ -0,0 +1,161 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+# Player states
+IDLE = "idle"
+LOADING = "loading"
+PLAYING = "playing"
+STOPPED = "stopped"
+
+# Events
+TRACK_END = "track_end"
+SKIP = "skip"
+ENQUEUE = "enqueue"
+STOP = "stop"
+
+# Results of one start attempt
+STARTED = "started"
+RETRY = "retry"
+EMPTY = "empty"
+
+
+class GuildPlayer:
+    def __init__(
+        self,
+        guild_id: int,
+        start_next: Callable[["GuildPlayer"], Awaitable[str]],
+        resume: Optional[Callable[["GuildPlayer"], Awaitable[bool]]] = None,
+    ):
+        self.guild_id = guild_id
+        self.start_next = start_next
+        # Called when a track ends early on its own, may restart it where it stopped
+        self.resume = resume
+
+        self.state = IDLE
+        self.events: asyncio.Queue = asyncio.Queue()
+        # Bumped for every start attempt so a late track_end of an old track is ignored
+        self.generation = 0
+        self.task: Optional[asyncio.Task] = None
+        self.voice_client = None
+        # Source handed to the voice client, exposes the playback position
+        self.source = None
+        self.skip_requested = False
+        self.resume_attempts = 0
+        # Latest interaction that fed the player, used for now playing messages
+        self.interaction = None
+
+        self.started = 0
+        self.retries = 0
+        self.resumed = 0
+        self.stale_events = 0
+
+    @property
+    def active(self) -> bool:
+        return self.state in (LOADING, PLAYING)
+
+    @property
+    def position(self) -> float:
+        return getattr(self.source, "position", 0.0) if self.source else 0.0
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    def post(self, event: str, generation: Optional[int] = None):
+        if self.state != STOPPED:
+            self.events.put_nowait((event, generation))
+
+    def after_callback(self, loop: asyncio.AbstractEventLoop):
+        generation = self.generation
+
+        # Runs on the voice thread, the event is handed back to the loop
+        def after(error):
+            if error:
+                print(f"Playback error: {error}")
+            try:
+                loop.call_soon_threadsafe(self.post, TRACK_END, generation)
+            except RuntimeError:
+                pass
+
+        return after
+
+    def stop_voice(self):
+        voice_client = self.voice_client
+        if voice_client and (voice_client.is_playing() or voice_client.is_paused()):
+            voice_client.stop()
+
+    async def run(self):
+        while self.state != STOPPED:
+            event, generation = await self.events.get()
+            try:
+                await self.handle(event, generation)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in music player for guild {self.guild_id}: {e}")
+                self.state = IDLE
+
+    async def handle(self, event: str, generation: Optional[int]):
+        if event == STOP:
+            self.state = STOPPED
+            self.generation += 1
+            self.stop_voice()
+        elif event == ENQUEUE:
+            if self.state == IDLE:
+                await self.advance()
+        elif event == SKIP:
+            # The voice client reports the end of the track, which starts the next one
+            if self.state == PLAYING:
+                self.skip_requested = True
+                self.stop_voice()
+            elif self.state == LOADING:
+                # Remembered, the track being loaded is skipped as soon as it starts
+                self.skip_requested = True
+        elif event == TRACK_END:
+            if self.state == PLAYING and generation == self.generation:
+                # Only covers sources that end early while the voice connection stays up,
+                # discord.py pauses playback itself across a voice reconnect
+                if not self.skip_requested and self.resume:
+                    self.generation += 1
+                    if await self.resume(self):
+                        self.resume_attempts += 1
+                        self.resumed += 1
+                        return
+                await self.advance()
+            else:
+                self.stale_events += 1
+
+    async def advance(self):
+        self.state = LOADING
+        self.skip_requested = False
+        self.resume_attempts = 0
+        self.source = None
+        while self.state == LOADING:
+            self.generation += 1
+            result = await self.start_next(self)
+            if result == STARTED:
+                self.state = PLAYING
+                self.started += 1
+                if self.skip_requested:
+                    self.stop_voice()
+            elif result == EMPTY:
+                self.state = IDLE
+            else:
+                self.retries += 1
+
+    def close(self):
+        self.state = STOPPED
+        self.generation += 1
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "pending_events": self.events.qsize(),
+            "started": self.started,
+            "retries": self.retries,
+            "resumed": self.resumed,
+            "position": self.position,
+            "stale_events": self.stale_events,
+        }
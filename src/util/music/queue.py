@@ -1,15 +1,224 @@
+import asyncio
+import itertools
+import random
 from collections import deque
-class Queue:
+from typing import Iterable, List, Optional
+from util.music.track import Track
+from util.music.track_cache import extract_video_id
+
+# Lanes, the head of the queue holds DJ picks, then "play next" songs, then everything else
+LANE_DJ = "dj"
+LANE_NEXT = "next"
+LANE_NORMAL = "normal"
+
+
+def _duration(track: Track) -> int:
+    return int(track.duration or 0)
+
+
+class OptimizedQueue:
     def __init__(self):
         self.queue = deque()
-        self.playing = False
+        self.current = None
+        self.lock = asyncio.Lock()
+        self.total_duration = 0
+        # entry_id -> seconds to start at, for songs restored mid-play
+        self.start_at = {}
+
+        # entry_id -> running sequence number, position = seq - head_seq
+        self._positions = {}
+        self._head_seq = 0
+        self._ids = itertools.count(1)
+        # video id -> number of queued entries, for dedupe
+        self._video_ids = {}
+        # entry_id -> lane, only for songs in the DJ and next lanes
+        self._lanes = {}
+        self._lane_counts = {LANE_DJ: 0, LANE_NEXT: 0}
+
+        self.version = 0
+        self.prefetch_task = None
+        self.prefetched = None
+
+    def add(self, track: Track, lane: str = LANE_NORMAL) -> int:
+        if lane != LANE_NORMAL:
+            self._insert_many([track], None, lane, False)
+            return track.entry_id
+        entry_id = self._track_added(track)
+        self._positions[entry_id] = self._head_seq + len(self.queue)
+        self.queue.append(track)
+        return entry_id
+
+    def _track_added(self, track: Track) -> int:
+        entry_id = next(self._ids)
+        track.entry_id = entry_id
+        self.total_duration += _duration(track)
+        video_id = extract_video_id(track.url)
+        if video_id:
+            self._video_ids[video_id] = self._video_ids.get(video_id, 0) + 1
+        return entry_id
+
+    def _track_removed(self, track: Track):
+        self._positions.pop(track.entry_id, None)
+        self.total_duration -= _duration(track)
+        video_id = extract_video_id(track.url)
+        count = self._video_ids.get(video_id, 0)
+        if count > 1:
+            self._video_ids[video_id] = count - 1
+        else:
+            self._video_ids.pop(video_id, None)
+        lane = self._lanes.pop(track.entry_id, None)
+        if lane:
+            self._lane_counts[lane] -= 1
+
+    def lane(self, entry_id: int) -> str:
+        return self._lanes.get(entry_id, LANE_NORMAL)
+
+    def contains(self, video_id: Optional[str]) -> bool:
+        if not video_id:
+            return False
+        if video_id in self._video_ids:
+            return True
+        return bool(self.current and extract_video_id(self.current.url) == video_id)
+
+    def _lane_position(self, lane: str) -> int:
+        if lane == LANE_DJ:
+            return self._lane_counts[LANE_DJ]
+        if lane == LANE_NEXT:
+            return self._lane_counts[LANE_DJ] + self._lane_counts[LANE_NEXT]
+        return len(self.queue)
+
+    async def add_many(
+        self,
+        tracks: Iterable[Track],
+        position: Optional[int] = None,
+        lane: str = LANE_NORMAL,
+        dedupe: bool = False,
+    ) -> List[Track]:
+        async with self.lock:
+            return self._insert_many(tracks, position, lane, dedupe)
+
+    def _insert_many(self, tracks: Iterable[Track], position: Optional[int], lane: str, dedupe: bool) -> List[Track]:
+        added = []
+        seen = set()
+        for track in tracks:
+            if not track:
+                continue
+            if dedupe:
+                video_id = extract_video_id(track.url)
+                if video_id and (video_id in seen or self.contains(video_id)):
+                    continue
+                seen.add(video_id)
+            added.append(track)
+        if not added:
+            return added
 
-    def add(self, source, meta):
-        self.queue.append((source, meta))
+        if position is None or lane != LANE_NORMAL:
+            position = self._lane_position(lane)
+        else:
+            # An explicit position never cuts into the DJ and next lanes
+            position = max(self._lane_position(LANE_NEXT), min(position, len(self.queue)))
+        at_end = position >= len(self.queue)
+
+        for track in added:
+            self._track_added(track)
+        if lane != LANE_NORMAL:
+            for track in added:
+                self._lanes[track.entry_id] = lane
+            self._lane_counts[lane] += len(added)
+
+        if at_end:
+            seq = self._head_seq + len(self.queue)
+            for offset, track in enumerate(added):
+                self._positions[track.entry_id] = seq + offset
+            self.queue.extend(added)
+        else:
+            # One rotation and one reindex for the whole batch
+            self.queue.rotate(-position)
+            self.queue.extendleft(reversed(added))
+            self.queue.rotate(position)
+            self._reindex()
+            self.invalidate_prefetch()
+        return added
 
     def get_next(self):
-        return self.queue.popleft() if self.queue else None
+        if not self.queue:
+            return None
+
+        track = self.queue.popleft()
+        self._track_removed(track)
+        self._head_seq += 1
+        return track
+
+    def update(self, track: Track, fields: dict):
+        if 'duration' in fields and track.entry_id in self._positions:
+            self.total_duration += int(fields['duration'] or 0) - _duration(track)
+        track.apply(fields)
+
+    def peek(self):
+        return self.queue[0] if self.queue else None
 
     def is_empty(self):
         return len(self.queue) == 0
-    
\ No newline at end of file
+
+    def position(self, entry_id: int) -> Optional[int]:
+        seq = self._positions.get(entry_id)
+        return None if seq is None else seq - self._head_seq
+
+    def page(self, start: int = 0, count: int = 10) -> List[Track]:
+        return list(itertools.islice(self.queue, start, start + count))
+
+    def _reindex(self):
+        self._head_seq = 0
+        self._positions = {track.entry_id: i for i, track in enumerate(self.queue)}
+
+    def clear(self):
+        self.queue.clear()
+        self.current = None
+        self._positions.clear()
+        self._video_ids.clear()
+        self._lanes.clear()
+        self._lane_counts = {LANE_DJ: 0, LANE_NEXT: 0}
+        self.start_at.clear()
+        self.total_duration = 0
+        self.invalidate_prefetch()
+
+    def shuffle(self):
+        # DJ picks and "play next" songs keep their place at the head
+        head = self._lane_position(LANE_NEXT)
+        songs = list(self.queue)
+        rest = songs[head:]
+        random.shuffle(rest)
+        self.queue = deque(songs[:head] + rest)
+        self._reindex()
+        self.invalidate_prefetch()
+
+    def cancel_prefetch_task(self):
+        if self.prefetch_task and not self.prefetch_task.done():
+            self.prefetch_task.cancel()
+        self.prefetch_task = None
+
+    def invalidate_prefetch(self):
+        self.version += 1
+        self.cancel_prefetch_task()
+        if self.prefetched:
+            _, _, source = self.prefetched
+            self.prefetched = None
+            try:
+                source.cleanup()
+            except Exception:
+                pass
+
+    def take_prefetched(self, track: Track):
+        if not self.prefetched:
+            return None
+
+        version, prefetched_track, source = self.prefetched
+        self.prefetched = None
+        if version == self.version and prefetched_track is track:
+            return source
+
+        try:
+            source.cleanup()
+        except Exception:
+            pass
+        return None
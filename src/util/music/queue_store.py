@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, Optional
+
+from util.music.queue import LANE_DJ, LANE_NORMAL, OptimizedQueue
+from util.music.track import Track
+
+
+def snapshot_queue(queue: OptimizedQueue, position: Optional[float] = None) -> Optional[dict]:
+    # position is None when nothing is playing, the last song is then already done
+    current = queue.current if position is not None else None
+    if not current and not queue.queue:
+        return None
+    return {
+        "current": current.to_dict() if current else None,
+        "position": position if current else 0.0,
+        "queue": [_entry(queue, track) for track in queue.queue],
+        "saved_at": time.time(),
+    }
+
+
+def _entry(queue: OptimizedQueue, track: Track) -> dict:
+    entry = track.to_dict()
+    lane = queue.lane(track.entry_id)
+    if lane != LANE_NORMAL:
+        entry["lane"] = lane
+    return entry
+
+
+def restore_queue(data: dict) -> OptimizedQueue:
+    queue = OptimizedQueue()
+    current = data.get("current")
+    if current:
+        # The interrupted song goes back to the head, ahead of the DJ picks, and continues where it was
+        track = Track.from_dict(current)
+        entry_id = queue.add(track, LANE_DJ)
+        if data.get("position"):
+            queue.start_at[entry_id] = data["position"]
+    # Saved in queue order, each lane lands behind what was restored into it before
+    for entry in data.get("queue", []):
+        queue.add(Track.from_dict(entry), entry.get("lane", LANE_NORMAL))
+    return queue
+
+
+class QueueStore:
+    def __init__(
+        self,
+        path: str,
+        snapshot: Callable[[], Dict[int, dict]],
+        playing: Callable[[], bool],
+        debounce: float = 5,
+        interval: float = 30,
+        max_age: float = 24 * 60 * 60,
+    ):
+        self.path = path
+        self.snapshot = snapshot
+        self.playing = playing
+        self.debounce = debounce
+        self.interval = interval
+        self.max_age = max_age
+
+        self.dirty = asyncio.Event()
+        self.saves = 0
+
+    def load(self) -> Dict[int, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError, OSError) as e:
+            print(f"Error loading saved queues: {e}")
+            return {}
+
+        cutoff = time.time() - self.max_age
+        return {
+            int(guild_id): saved
+            for guild_id, saved in data.get("guilds", {}).items()
+            if saved.get("saved_at", 0) >= cutoff
+        }
+
+    def write(self, guilds: Dict[int, dict]):
+        data = {"guilds": {str(guild_id): saved for guild_id, saved in guilds.items()}}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.saves += 1
+        except (IOError, OSError) as e:
+            print(f"Error saving queues: {e}")
+
+    def touch(self):
+        self.dirty.set()
+
+    def flush(self):
+        self.write(self.snapshot())
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.dirty.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                # Playback positions move on their own, save them while something plays
+                if not self.playing():
+                    continue
+
+            # Let a burst of changes settle into one write
+            await asyncio.sleep(self.debounce)
+            self.dirty.clear()
+            try:
+                await asyncio.to_thread(self.write, self.snapshot())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error saving queues: {e}")
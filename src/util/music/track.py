@@ -0,0 +1,109 @@
+from typing import Optional
+
+UNAVAILABLE_TITLES = ("[Private video]", "[Deleted video]", "[Unavailable video]")
+
+
+class Track:
+    __slots__ = (
+        "title",
+        "duration",
+        "author",
+        "url",
+        "thumbnail",
+        "likes",
+        "views",
+        "upload_date",
+        "requester",
+        "entry_id",
+        "resolved",
+    )
+
+    def __init__(
+        self,
+        title: str = "Unknown title",
+        duration: int = 0,
+        author: str = "Unknown author",
+        url: str = "Unknown URL",
+        thumbnail: Optional[str] = None,
+        likes: int = 0,
+        views: int = 0,
+        upload_date: str = "Unknown date",
+        requester: Optional[int] = None,
+        resolved: bool = True,
+    ):
+        self.title = title
+        self.duration = duration
+        self.author = author
+        self.url = url
+        self.thumbnail = thumbnail
+        self.likes = likes
+        self.views = views
+        self.upload_date = upload_date
+        self.requester = requester
+        self.entry_id = None
+        self.resolved = resolved
+
+    def __repr__(self):
+        return f"<Track title={self.title!r} duration={self.duration} url={self.url!r}>"
+
+    @classmethod
+    def from_info(cls, info: dict, requester: Optional[int] = None) -> "Track":
+        # Copies only what the cog shows, the yt-dlp dict can be dropped afterwards
+        return cls(
+            title=info.get("title", "Unknown title"),
+            duration=info.get("duration") or 0,
+            author=info.get("uploader", "Unknown author"),
+            url=info.get("webpage_url", "Unknown URL"),
+            thumbnail=info.get("thumbnail"),
+            likes=info.get("like_count") or 0,
+            views=info.get("view_count") or 0,
+            upload_date=info.get("upload_date", "Unknown date"),
+            requester=requester,
+        )
+
+    @classmethod
+    def placeholder(cls, entry: dict, requester: Optional[int] = None) -> Optional["Track"]:
+        if not entry or entry.get("title") in UNAVAILABLE_TITLES:
+            return None
+
+        video_id = entry.get("id")
+        url = entry.get("webpage_url") or entry.get("url")
+        if not url and video_id:
+            url = f"https://www.youtube.com/watch?v={video_id}"
+        if not url:
+            return None
+
+        thumbnails = entry.get("thumbnails") or []
+        return cls(
+            title=entry.get("title", "Unknown title"),
+            duration=entry.get("duration") or 0,
+            author=entry.get("uploader") or entry.get("channel") or "Unknown author",
+            url=url,
+            thumbnail=entry.get("thumbnail") or (thumbnails[-1].get("url") if thumbnails else None),
+            views=entry.get("view_count") or 0,
+            requester=requester,
+            resolved=False,
+        )
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if name != "entry_id"}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Track":
+        return cls(**{name: value for name, value in data.items() if name in cls.__slots__ and name != "entry_id"})
+
+    def apply(self, fields: dict):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def resolved_fields(self, info: dict) -> dict:
+        return {
+            "title": info.get("title", self.title),
+            "thumbnail": info.get("thumbnail") or self.thumbnail,
+            "duration": info.get("duration") or self.duration,
+            "author": info.get("uploader", self.author),
+            "likes": info.get("like_count") or 0,
+            "views": info.get("view_count") or self.views,
+            "upload_date": info.get("upload_date", "Unknown date"),
+            "resolved": True,
+        }
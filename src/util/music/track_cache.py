@@ -0,0 +1,239 @@
+import re
+import sys
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+# Fields that stay valid for as long as the video exists
+METADATA_FIELDS = (
+    "id",
+    "title",
+    "duration",
+    "uploader",
+    "thumbnail",
+    "webpage_url",
+    "like_count",
+    "view_count",
+    "upload_date",
+    "acodec",
+)
+
+_VIDEO_ID_RE = re.compile(r"(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([\w-]{11})")
+_SEARCH_PREFIX_RE = re.compile(r"^ytsearch\d*:", re.IGNORECASE)
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    if not url:
+        return None
+    match = _VIDEO_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def cache_key(url: str) -> Optional[str]:
+    if not url:
+        return None
+
+    if url.startswith("http"):
+        # Playlist links resolve to many entries, never cache them as one track
+        if "list" in parse_qs(urlparse(url).query):
+            return None
+        video_id = extract_video_id(url)
+        return f"id:{video_id}" if video_id else f"url:{url.strip()}"
+
+    # Only single-result searches map onto one track
+    prefix = _SEARCH_PREFIX_RE.match(url)
+    if prefix and prefix.group(0).lower() not in ("ytsearch:", "ytsearch1:"):
+        return None
+    query = url[prefix.end():] if prefix else url
+    return f"q:{normalize_query(query)}"
+
+
+def stream_expiry(stream_url: str) -> Optional[int]:
+    try:
+        expire = parse_qs(urlparse(stream_url).query).get("expire")
+        return int(expire[0]) if expire else None
+    except (ValueError, TypeError):
+        return None
+
+
+def _estimate_size(value) -> int:
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class TrackCache:
+    def __init__(
+        self,
+        max_entries: int = 2000,
+        max_bytes: int = 8 * 1024 * 1024,
+        metadata_ttl: int = 6 * 60 * 60,
+        stream_ttl: int = 30 * 60,
+        expiry_margin: int = 120,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.metadata_ttl = metadata_ttl
+        self.stream_ttl = stream_ttl
+        self.expiry_margin = expiry_margin
+
+        # video id -> (metadata, size, stored_at), kept in LRU order
+        self.metadata: "OrderedDict[str, tuple]" = OrderedDict()
+        # video id -> (stream_url, fresh_until)
+        self.streams = {}
+        # cache key (normalized query / url) -> (video id, was a search result)
+        self.aliases: "OrderedDict[str, tuple]" = OrderedDict()
+        # video id -> its alias keys, so evicting a video drops only those
+        self.alias_keys = {}
+        self.bytes_used = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stream_refreshes = 0
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def _resolve(self, key: str, touch: bool = True) -> tuple:
+        if key.startswith("id:"):
+            return key[3:], False
+        alias = self.aliases.get(key)
+        if alias:
+            if touch:
+                self.aliases.move_to_end(key)
+            return alias
+        return None, False
+
+    def _lookup(self, url: str, touch: bool = True) -> tuple:
+        # (video id, wrapped, metadata), metadata is None when missing or expired
+        key = cache_key(url)
+        video_id, wrapped = self._resolve(key, touch) if key else (None, False)
+        item = self.metadata.get(video_id) if video_id else None
+        if item is None or time.time() - item[2] > self.metadata_ttl:
+            return video_id, wrapped, None
+        return video_id, wrapped, item[0]
+
+    def _with_stream(self, video_id: str, wrapped: bool, metadata: dict) -> Optional[dict]:
+        stream = self.streams.get(video_id)
+        # The stream has to outlive the whole track, FFmpeg reconnects reuse the same URL
+        if not stream or time.time() + (metadata.get("duration") or 0) >= stream[1]:
+            return None
+        info = dict(metadata)
+        info["url"] = stream[0]
+        # Searches hand back a one-entry playlist, keep that shape for the callers
+        return {"_type": "playlist", "entries": [info]} if wrapped else info
+
+    def get(self, url: str) -> Optional[dict]:
+        video_id, wrapped, metadata = self._lookup(url)
+        if metadata is None:
+            if video_id in self.metadata:
+                self._evict(video_id)
+            self.misses += 1
+            return None
+
+        info = self._with_stream(video_id, wrapped, metadata)
+        if info is None:
+            # The metadata stays, only the stream url has to be resolved again
+            self.stream_refreshes += 1
+            return None
+
+        self.metadata.move_to_end(video_id)
+        self.hits += 1
+        return info
+
+    def peek(self, url: str) -> Optional[dict]:
+        # Read-only, leaves the stats, LRU order and stale entries alone
+        video_id, wrapped, metadata = self._lookup(url, touch=False)
+        if metadata is None:
+            return None
+        return self._with_stream(video_id, wrapped, metadata)
+
+    def stream_source(self, url: str) -> Optional[str]:
+        # Where to resolve just the stream again while the metadata is still valid
+        video_id, _, metadata = self._lookup(url, touch=False)
+        if metadata is None:
+            return None
+        return metadata.get("webpage_url") or f"https://www.youtube.com/watch?v={video_id}"
+
+    def put(self, url: str, info: dict):
+        if not info:
+            return
+
+        entry = info
+        wrapped = "entries" in info
+        if wrapped:
+            entries = [e for e in info["entries"] if e]
+            if len(entries) != 1:
+                for e in entries:
+                    self.store_entry(e)
+                return
+            entry = entries[0]
+
+        video_id = self.store_entry(entry)
+        key = cache_key(url)
+        if video_id and key and not key.startswith("id:") and video_id in self.metadata:
+            self._drop_alias(key)
+            self.aliases[key] = (video_id, wrapped)
+            self.alias_keys.setdefault(video_id, set()).add(key)
+            while len(self.aliases) > self.max_entries * 4:
+                self._drop_alias(next(iter(self.aliases)))
+
+    def _drop_alias(self, key: str):
+        alias = self.aliases.pop(key, None)
+        if alias is None:
+            return
+        keys = self.alias_keys.get(alias[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.alias_keys[alias[0]]
+
+    def store_entry(self, entry: dict) -> Optional[str]:
+        video_id = entry.get("id") or extract_video_id(entry.get("webpage_url", ""))
+        if not video_id or "url" not in entry:
+            return None
+
+        metadata = {field: entry.get(field) for field in METADATA_FIELDS if entry.get(field) is not None}
+        metadata["id"] = video_id
+        stream_url = entry["url"]
+        size = _estimate_size(metadata) + sys.getsizeof(stream_url)
+
+        if video_id in self.metadata:
+            self.bytes_used -= self.metadata[video_id][1]
+        self.metadata[video_id] = (metadata, size, time.time())
+        self.metadata.move_to_end(video_id)
+        self.bytes_used += size
+
+        expire = stream_expiry(stream_url)
+        fresh_until = (expire if expire else time.time() + self.stream_ttl) - self.expiry_margin
+        self.streams[video_id] = (stream_url, fresh_until)
+
+        self._enforce_limits()
+        return video_id
+
+    def _evict(self, video_id: str):
+        item = self.metadata.pop(video_id, None)
+        if item:
+            self.bytes_used -= item[1]
+        self.streams.pop(video_id, None)
+        for key in self.alias_keys.pop(video_id, ()):
+            self.aliases.pop(key, None)
+
+    def _enforce_limits(self):
+        while self.metadata and (len(self.metadata) > self.max_entries or self.bytes_used > self.max_bytes):
+            self._evict(next(iter(self.metadata)))
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.metadata),
+            "streams": len(self.streams),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stream_refreshes": self.stream_refreshes,
+        }
@@ -0,0 +1,234 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import discord
+
+# Lower runs first
+HIGH = 0     # replies a user is waiting for
+NORMAL = 1
+LOW = 2      # cosmetic edits, progress bars, cleanup
+
+# kind -> (requests, per seconds), close to Discord's per-route buckets
+ROUTE_LIMITS = {
+    "send": (5, 5.0),
+    "edit": (5, 5.0),
+    "delete": (5, 1.0),
+    "reaction": (1, 0.25),
+    # Discord only allows two name or topic changes per channel every ten minutes
+    "channel_rename": (2, 600.0),
+    "channel_edit": (5, 5.0),
+    "thread_member": (5, 5.0),
+    "webhook": (5, 2.0),
+    "webhook_delete": (5, 5.0),
+    "dm": (5, 5.0),
+}
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def drain(self, retry_after: float):
+        # Discord said no, nothing goes out on this route until retry_after has passed
+        self.tokens = -retry_after * self.rate
+        self.updated = time.monotonic()
+
+
+class Job:
+    __slots__ = ("call", "future", "queued_at", "coalesce_key")
+
+    def __init__(self, call: Callable[[], Awaitable[Any]], coalesce_key: Optional[Hashable]):
+        self.call = call
+        self.future = asyncio.get_running_loop().create_future()
+        # Fire-and-forget callers never look at the result, errors are printed by the scheduler
+        self.future.add_done_callback(lambda future: future.cancelled() or future.exception())
+        self.queued_at = time.monotonic()
+        self.coalesce_key = coalesce_key
+
+
+class OutboundScheduler:
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.limits = limits or ROUTE_LIMITS
+
+        self.buckets: Dict[tuple, TokenBucket] = {}
+        # route -> heap of (priority, seq, job)
+        self.pending: Dict[tuple, list] = {}
+        self.workers: Dict[tuple, asyncio.Task] = {}
+        # coalesce key -> job still waiting, a newer call replaces what it will send
+        self.coalescing: Dict[Hashable, Job] = {}
+        self._seq = itertools.count()
+
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+
+    def _bucket(self, route: tuple) -> TokenBucket:
+        bucket = self.buckets.get(route)
+        if bucket is None:
+            capacity, period = self.limits.get(route[0], (5, 5.0))
+            bucket = self.buckets[route] = TokenBucket(capacity, period)
+        return bucket
+
+    def submit(
+        self,
+        route: tuple,
+        call: Callable[[], Awaitable[Any]],
+        priority: int = NORMAL,
+        coalesce_key: Optional[Hashable] = None,
+    ) -> asyncio.Future:
+        if coalesce_key is not None:
+            waiting = self.coalescing.get(coalesce_key)
+            if waiting is not None and not waiting.future.done():
+                # Only the latest state matters, the queued job sends this instead
+                waiting.call = call
+                self.coalesced += 1
+                return waiting.future
+
+        job = Job(call, coalesce_key)
+        if coalesce_key is not None:
+            self.coalescing[coalesce_key] = job
+        heapq.heappush(self.pending.setdefault(route, []), (priority, next(self._seq), job))
+
+        worker = self.workers.get(route)
+        if worker is None or worker.done():
+            self.workers[route] = asyncio.create_task(self._drain(route))
+        return job.future
+
+    async def run(self, route: tuple, call: Callable[[], Awaitable[Any]], priority: int = NORMAL, coalesce_key: Optional[Hashable] = None):
+        return await self.submit(route, call, priority, coalesce_key)
+
+    async def _drain(self, route: tuple):
+        bucket = self._bucket(route)
+        heap = self.pending[route]
+        try:
+            while heap:
+                wait = bucket.wait_time()
+                if wait:
+                    await asyncio.sleep(wait)
+                    continue
+
+                _priority, _seq, job = heapq.heappop(heap)
+                if job.coalesce_key is not None and self.coalescing.get(job.coalesce_key) is job:
+                    del self.coalescing[job.coalesce_key]
+                if job.future.done():
+                    continue
+
+                delay = time.monotonic() - job.queued_at
+                self.total_delay += delay
+                self.max_delay = max(self.max_delay, delay)
+
+                bucket.take()
+                await self._execute(route, bucket, job)
+        finally:
+            if not heap:
+                self.pending.pop(route, None)
+                self.workers.pop(route, None)
+
+    async def _execute(self, route: tuple, bucket: TokenBucket, job: Job):
+        # discord.py already waits out and retries 429s, a 429 that gets here means it gave up
+        try:
+            result = await job.call()
+        except discord.HTTPException as e:
+            if e.status == 429:
+                self.rate_limited += 1
+                bucket.drain(getattr(e, "retry_after", None) or 1.0)
+            self._fail(route, job, e)
+            return
+        except Exception as e:
+            self._fail(route, job, e)
+            return
+
+        self.sent += 1
+        if not job.future.done():
+            job.future.set_result(result)
+
+    def _fail(self, route: tuple, job: Job, error: Exception):
+        self.failed += 1
+        print(f"Error running outbound {route[0]} request: {error}")
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    # Helpers for the calls the cogs make
+
+    def send(self, channel: discord.abc.Messageable, priority: int = HIGH, **kwargs) -> asyncio.Future:
+        return self.submit(("send", getattr(channel, "id", None)), lambda: channel.send(**kwargs), priority)
+
+    def edit(self, message: discord.Message, priority: int = LOW, **kwargs) -> asyncio.Future:
+        return self.submit(
+            ("edit", message.channel.id),
+            lambda: message.edit(**kwargs),
+            priority,
+            coalesce_key=("edit", message.id, tuple(sorted(kwargs))),
+        )
+
+    def delete(self, message: discord.Message, priority: int = LOW) -> asyncio.Future:
+        return self.submit(
+            ("delete", message.channel.id),
+            message.delete,
+            priority,
+            coalesce_key=("delete", message.id),
+        )
+
+    def react(self, message: discord.Message, emoji, priority: int = LOW) -> asyncio.Future:
+        return self.submit(("reaction", message.channel.id), lambda: message.add_reaction(emoji), priority)
+
+    def edit_channel(self, channel, priority: int = LOW, **kwargs) -> asyncio.Future:
+        # Renames have their own much smaller bucket, other edits must not use it up
+        kind = "channel_rename" if "name" in kwargs or "topic" in kwargs else "channel_edit"
+        return self.submit(
+            (kind, channel.id),
+            lambda: channel.edit(**kwargs),
+            priority,
+            coalesce_key=("channel_edit", channel.id, tuple(sorted(kwargs))),
+        )
+
+    def remove_thread_member(self, thread: discord.Thread, member, priority: int = NORMAL) -> asyncio.Future:
+        return self.submit(("thread_member", thread.id), lambda: thread.remove_user(member), priority)
+
+    def webhook_send(self, webhook: discord.Webhook, priority: int = HIGH, **kwargs) -> asyncio.Future:
+        return self.submit(("webhook", webhook.id), lambda: webhook.send(**kwargs), priority)
+
+    def delete_webhook(self, webhook: discord.Webhook, priority: int = LOW) -> asyncio.Future:
+        return self.submit(("webhook_delete", webhook.channel_id), webhook.delete, priority)
+
+    def dm(self, user: discord.abc.User, priority: int = NORMAL, **kwargs) -> asyncio.Future:
+        return self.submit(("dm", user.id), lambda: user.send(**kwargs), priority)
+
+    def stats(self) -> dict:
+        done = self.sent + self.failed
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+            "queued": sum(len(heap) for heap in self.pending.values()),
+            "avg_delay": self.total_delay / done if done else 0.0,
+            "max_delay": self.max_delay,
+        }
+
+
+scheduler = OutboundScheduler()
@@ -3,17 +3,18 @@ import discord
 from discord.ui import View, Button
 from util.constants import *
 from modals.ticketmodals import *
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
+from util.music.guards import IN_VOICE, MUTED, SAME_CHANNEL
+from util.music.leaderboard import WINDOW_LABELS
 from util.tickets.ticket_creator import get_ticket_creator, delete_ticket_creator
+from util.outbound import scheduler
 from lang.texts import *
-import asyncio
 import logging
 import colorlog
 
 if TYPE_CHECKING:
     from cogs.tickets import TicketCog
     from cogs.music import MusicCog
-import re
 
 async def closeTicket(self, interaction: discord.Interaction):
     guild = interaction.guild
@@ -47,8 +48,7 @@ async def closeTicket(self, interaction: discord.Interaction):
 
         if not has_required_role:
             logger.info(f"Removing user {guild_member} from ticket channel {interaction.channel}")
-            await interaction.channel.remove_user(guild_member)
-            await asyncio.sleep(0.5)
+            await scheduler.remove_thread_member(interaction.channel, guild_member)
 
             if SEND_TICKET_FEEDBACK is True:                
                 embed = discord.Embed(
@@ -61,7 +61,7 @@ async def closeTicket(self, interaction: discord.Interaction):
                 embed.set_footer(text=EMBED_FOOTER)
                 embed.timestamp = discord.utils.utcnow()
                 logger.info(f"Sending closed ticket embed to {guild_member}")
-                await guild_member.send(embed=embed)
+                scheduler.dm(guild_member, embed=embed)
         else:
             logger.debug(f"User {guild_member} has required role, not removing from ticket channel")
         
@@ -117,21 +117,13 @@ async def closeTicket(self, interaction: discord.Interaction):
                 value=support_list,
                 inline=False
             )
+        # Renames are limited to two per ten minutes, the scheduler holds it back instead of the close message
+        logger.info(f"Renaming channel {interaction.channel} to closed")
+        scheduler.edit_channel(interaction.channel, name=f"[CLOSED] {interaction.channel.name}")
         try:
-            logger.info(f"Renaming channel {interaction.channel} to closed")
-            await interaction.channel.edit(name=f"[CLOSED] {interaction.channel.name}")
-            await asyncio.sleep(0.5)
-
-            await interaction.channel.send(embed=close_embed, view=CloseThreadView(ticketcog=self.ticketcog, bot=self.bot))
+            await scheduler.send(interaction.channel, embed=close_embed, view=CloseThreadView(ticketcog=self.ticketcog, bot=self.bot))
         except discord.HTTPException as e:
             logger.error(f"HTTPException while closing ticket: {e}")
-            if e.status == 429:
-                await asyncio.sleep(e.retry_after if hasattr(e, 'retry_after') else 1)
-                await interaction.channel.edit(name=f"[CLOSED] {interaction.channel.name}")
-                await asyncio.sleep(0.5)
-                await interaction.channel.send(embed=close_embed, view=CloseThreadView(ticketcog=self.ticketcog, bot=self.bot))
-            else:
-                await interaction.channel.send(embed=close_embed, view=CloseThreadView(ticketcog=self.ticketcog, bot=self.bot))
     
 # Setup colored logging
 handler = colorlog.StreamHandler()
@@ -187,28 +179,19 @@ class ActionsView(View):
         self.add_item(charts_btn)
         self.add_item(history_btn)
 
-    async def mostplayed(self, interaction: discord.Interaction):
-        history = await self.get_history(interaction)
-
-        if not history:
-            embed = discord.Embed(
-                title="❌ No History Found",
-                description="I couldn't find any songs in the recent history.",
-                color=0xff0000
-            )
-            embed.set_footer(text="Try playing some music first!")
-            embed.timestamp = discord.utils.utcnow()
-            await interaction.followup.send(embed=embed, ephemeral=True)
-            return
-
-        song_counts = {}
-        for song in history:
-            song_counts[song] = song_counts.get(song, 0) + 1
+    def build_mostplayed(self, guild: discord.Guild, window: str = "all", user: Optional[discord.abc.User] = None):
+        music_cog: "MusicCog" = self.bot.get_cog("MusicCog")
+        if not music_cog or not guild:
+            return None, None
 
-        sorted_songs = sorted(song_counts.items(), key=lambda x: x[1], reverse=True)
+        user_id = user.id if user else None
+        top_songs = music_cog.leaderboard.top(guild.id, window, user_id, 10)
+        if not top_songs:
+            return None, None
+        unique_songs, total_plays = music_cog.leaderboard.summary(guild.id, window, user_id)
 
         lines = []
-        for i, (song, count) in enumerate(sorted_songs[:10], 1):
+        for i, (_video_id, song, count) in enumerate(top_songs, 1):
             rank_emoji = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "🎵"
             lines.append(f"{rank_emoji} **{i}.** {song} • `{count}×`")
 
@@ -219,23 +202,47 @@ class ActionsView(View):
         )
         embed.add_field(
             name="📊 Statistics",
-            value=f"• Unique songs: **{len(song_counts)}**\n• Total plays: **{sum(song_counts.values())}**",
+            value=f"• Unique songs: **{unique_songs}**\n• Total plays: **{total_plays}**",
             inline=True
         )
-        if interaction.guild and interaction.guild.icon:
-            embed.set_thumbnail(url=interaction.guild.icon.url)
+        embed.add_field(
+            name="🕒 Window",
+            value=f"{WINDOW_LABELS[window]}" + (f"\n• Requested by **{user.display_name}**" if user else ""),
+            inline=True
+        )
+        if guild.icon:
+            embed.set_thumbnail(url=guild.icon.url)
         embed.set_footer(text="Tap a button below to play a top track.")
         embed.timestamp = discord.utils.utcnow()
 
-        view = self.MostPlayedView(self.bot, sorted_songs[:3])
-        await interaction.followup.send(embed=embed, view=view)
+        view = self.MostPlayedView(self, top_songs[:3], window, user)
+        return embed, view
+
+    async def mostplayed(self, interaction: discord.Interaction):
+        embed, view = self.build_mostplayed(interaction.guild)
+
+        if not embed:
+            embed = discord.Embed(
+                title="❌ No History Found",
+                description="I couldn't find any songs in the recent history.",
+                color=0xff0000
+            )
+            embed.set_footer(text="Try playing some music first!")
+            embed.timestamp = discord.utils.utcnow()
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        await interaction.response.send_message(embed=embed, view=view)
 
     class MostPlayedView(View):
-        def __init__(self, bot, top_songs):
+        def __init__(self, actions_view: "ActionsView", top_songs, window: str, user):
             super().__init__(timeout=300)
-            self.bot = bot
+            self.actions_view = actions_view
+            self.bot = actions_view.bot
+            self.window = window
+            self.user = user
 
-            for i, (song, _) in enumerate(top_songs):
+            for i, (video_id, song, _) in enumerate(top_songs):
                 display_name = song[:40] + "…" if len(song) > 40 else song
                 rank_emoji = "🥇" if i == 0 else "🥈" if i == 1 else "🥉"
                 button = Button(
@@ -244,13 +251,27 @@ class ActionsView(View):
                     emoji=rank_emoji,
                     row=0
                 )
-                button.callback = self.create_play_callback(song)
+                button.callback = self.create_play_callback(f"https://www.youtube.com/watch?v={video_id}")
                 self.add_item(button)
 
             refresh_btn = Button(label="Refresh", emoji="🔄", style=SECONDARY, row=1)
             refresh_btn.callback = self.refresh_callback
             self.add_item(refresh_btn)
 
+            for window_key, label in (("24h", "24h"), ("7d", "7 days"), ("all", "All time")):
+                window_btn = Button(
+                    label=label,
+                    style=PURPLE if window_key == window else SECONDARY,
+                    disabled=(window_key == window),
+                    row=1
+                )
+                window_btn.callback = self.create_window_callback(window_key)
+                self.add_item(window_btn)
+
+            mine_btn = Button(label="Everyone" if user else "Mine", emoji="👤", style=SECONDARY, row=1)
+            mine_btn.callback = self.mine_callback
+            self.add_item(mine_btn)
+
         def create_play_callback(self, song: str):
             async def play_callback(interaction: discord.Interaction):
                 music_cog = self.bot.get_cog("MusicCog")
@@ -265,57 +286,47 @@ class ActionsView(View):
                     await interaction.response.send_message(embed=embed, ephemeral=True)
             return play_callback
 
+        async def show(self, interaction: discord.Interaction, window: str, user):
+            embed, view = self.actions_view.build_mostplayed(interaction.guild, window, user)
+            if not embed:
+                await interaction.response.send_message(
+                    embed=discord.Embed(
+                        title="No plays",
+                        description="Nothing was played in this time window yet.",
+                        color=0x4ecdc4
+                    ),
+                    ephemeral=True,
+                    delete_after=6
+                )
+                return
+            await interaction.response.edit_message(embed=embed, view=view)
+
+        def create_window_callback(self, window: str):
+            async def window_callback(interaction: discord.Interaction):
+                await self.show(interaction, window, self.user)
+            return window_callback
+
         async def refresh_callback(self, interaction: discord.Interaction):
-            await interaction.response.send_message(
-                embed=discord.Embed(
-                    title="Refreshed",
-                    description="Please re-open Most Played to fetch latest stats.",
-                    color=0x4ecdc4
-                ),
-                ephemeral=True,
-                delete_after=6
-            )
+            await self.show(interaction, self.window, self.user)
+
+        async def mine_callback(self, interaction: discord.Interaction):
+            await self.show(interaction, self.window, None if self.user else interaction.user)
 
     async def get_history(self, interaction: discord.Interaction) -> list:
         if not interaction.response.is_done():
             await interaction.response.defer()
-        history_list = []
 
-        channel = None
+        music_cog: "MusicCog" = self.bot.get_cog("MusicCog")
+        if not music_cog or not interaction.guild:
+            return []
+
         try:
-            channel = await self.bot.fetch_channel(I_CHANNEL)
+            rows = await music_cog.history.recent(interaction.guild.id, PLAY_HISTORY_LIMIT)
         except Exception as e:
-            logger.error(f"get_history fetch_channel error: {e}")
+            logger.error(f"get_history query error: {e}")
+            return []
 
-        if channel:
-            try:
-                async for message in channel.history(limit=300):
-                    if (
-                    message.author == self.bot.user and
-                    message.embeds
-                    ):
-                        embed = message.embeds[0]
-                        if embed.title and embed.title.lower().strip() == "now playing":
-                            desc = embed.description or ""
-                            song_name = None
-
-                            m = re.search(r"\*\*(.*?)\*\*", desc)
-                            if m:
-                                song_name = m.group(1).strip()
-                            else:
-                                idx = desc.lower().find("now playing:")
-                                if idx != -1:
-                                    after = desc[idx + len("now playing:"):].strip()
-                                    song_name = after.splitlines()[0].strip().strip("* ").strip()
-                                else:
-                                    song_name = desc.splitlines()[0].strip()
-
-                            if song_name:
-                                history_list.append(song_name)
-            except Exception as e:
-                logger.error(f"get_history history parse error: {e}")
-
-        self.song_history = history_list[::-1]
+        self.song_history = [title for _video_id, title, _requester, _played_at in reversed(rows)]
         return self.song_history
 
     async def ran_song(self, interaction: discord.Interaction):
@@ -333,6 +344,9 @@ class ActionsView(View):
     async def charts_song(self, interaction: discord.Interaction):
         music_cog: "MusicCog" = self.bot.get_cog("MusicCog")
         if music_cog:
+            # Calling the callback directly skips the guarded() check of /chart
+            if await music_cog.guards.reject(interaction, (MUTED, IN_VOICE, SAME_CHANNEL)):
+                return
             await music_cog.play_chart.callback(music_cog, interaction)
         else:
             embed = discord.Embed(
@@ -475,7 +489,7 @@ class CloseReasonConfirmView(View):
         
     async def yes_button(self, interaction: discord.Interaction):
         logger.info(f"{interaction.user} confirmed closing ticket with reason '{self.reason}' in {interaction.channel}")
-        await interaction.message.delete()
+        await scheduler.delete(interaction.message)
         global DELETE_USER
         DELETE_USER = interaction.user
         reason = self.reason
@@ -510,12 +524,11 @@ class CloseReasonConfirmView(View):
 
             if not has_required_role:
                 logger.info(f"Removing user {guild_member} from ticket channel {interaction.channel}")
-                await interaction.channel.remove_user(guild_member)
-                await asyncio.sleep(0.5)
+                await scheduler.remove_thread_member(interaction.channel, guild_member)
                 
                 if SEND_TICKET_FEEDBACK is True:
                     logger.info(f"Sending closed ticket embed to {guild_member}")
-                    await guild_member.send(embed=embed)
+                    scheduler.dm(guild_member, embed=embed)
             else:
                 logger.debug(f"User {guild_member} has required role, not removing from ticket channel")
             
@@ -588,29 +601,21 @@ class CloseReasonConfirmView(View):
                     inline=False
                 )
                 
-            try:
-                logger.info(f"Renaming channel {interaction.channel} to closed")
-                await interaction.channel.edit(name=f"[CLOSED] {interaction.channel.name}")
-                await asyncio.sleep(0.5)
+            logger.info(f"Renaming channel {interaction.channel} to closed")
+            scheduler.edit_channel(interaction.channel, name=f"[CLOSED] {interaction.channel.name}")
 
-                close_embed.set_thumbnail(url=interaction.guild.icon.url if interaction.guild.icon else None)
-                close_embed.set_footer(text=f"{EMBED_FOOTER}", icon_url=interaction.user.display_avatar.url)
-                close_embed.timestamp = discord.utils.utcnow()
-                
-                await interaction.channel.send(embed=close_embed, view=CloseThreadView(ticketcog=self.ticketcog, bot=self.bot))
+            close_embed.set_thumbnail(url=interaction.guild.icon.url if interaction.guild.icon else None)
+            close_embed.set_footer(text=f"{EMBED_FOOTER}", icon_url=interaction.user.display_avatar.url)
+            close_embed.timestamp = discord.utils.utcnow()
+
+            try:
+                await scheduler.send(interaction.channel, embed=close_embed, view=CloseThreadView(ticketcog=self.ticketcog, bot=self.bot))
             except discord.HTTPException as e:
                 logger.error(f"HTTPException while closing ticket: {e}")
-                if e.status == 429:
-                    await asyncio.sleep(e.retry_after if hasattr(e, 'retry_after') else 1)
-                    await interaction.channel.edit(name=f"[CLOSED] {interaction.channel.name}")
-                    await asyncio.sleep(0.5)
-                    await interaction.channel.send(embed=close_embed, view=CloseThreadView(ticketcog=self.ticketcog, bot=self.bot))
-                else:
-                    await interaction.channel.send(embed=close_embed, view=CloseThreadView(ticketcog=self.ticketcog, bot=self.bot))
 
     async def no_button(self, interaction: discord.Interaction):
         logger.info(f"{interaction.user} cancelled closing ticket with reason in {interaction.channel}")
-        await interaction.message.delete()
+        await scheduler.delete(interaction.message)
 
 # The close view, if you closed a ticket
 class CloseThreadView(View):
@@ -738,17 +743,14 @@ class CloseThreadView(View):
                     bot_messages.append(message)
                 
                 for message in bot_messages[1:]:
-                    try:
-                        await message.delete()
-                        logger.debug(f"Deleted bot embed message in {interaction.channel}")
-                    except Exception as e:
-                        logger.error(f"Error deleting bot embed message: {e}")
+                    scheduler.delete(message)
+                    logger.debug(f"Queued delete of bot embed message in {interaction.channel}")
                         
                 current_channel_name = interaction.channel.name
                 if current_channel_name.startswith("[CLOSED] "):
                     current_channel_name = current_channel_name[9:]
                     
-                await interaction.channel.edit(name=current_channel_name)
+                scheduler.edit_channel(interaction.channel, name=current_channel_name)
                 embed = discord.Embed(
                 title="✅ Setup abgeschlossen",
                 description="Alle setup Nachrichten im Ticket wurden gelöscht.",
@@ -756,7 +758,6 @@ class CloseThreadView(View):
                 )
                 await interaction.followup.send_message(embed=embed, ephemeral=True, delete_after=20)
                 
-                await asyncio.sleep(0.5)
                 await interaction.channel.add_user(TICKET_CREATOR)
                 
                 reopen_embed = discord.Embed(
@@ -764,7 +765,7 @@ class CloseThreadView(View):
                 description=f"{TICKET_CREATOR.mention} Das Ticket wurde neu eröffnet.",
                 color=0x00ff00
                 )
-                await interaction.channel.send(embed=reopen_embed)
+                await scheduler.send(interaction.channel, embed=reopen_embed)
         
 # The view, where you can deside between "yes" and "no"
 class CloseConfirmView(View):
@@ -784,12 +785,12 @@ class CloseConfirmView(View):
         
     async def yes_button(self, interaction: discord.Interaction):
         logger.info(f"{interaction.user} confirmed closing ticket without reason in {interaction.channel}")
-        await interaction.message.delete()
+        await scheduler.delete(interaction.message)
         await closeTicket(self, interaction=interaction)
     
     async def no_button(self, interaction: discord.Interaction):
         logger.info(f"{interaction.user} cancelled closing ticket without reason in {interaction.channel}")
-        await interaction.message.delete()
+        await scheduler.delete(interaction.message)
 
 # The ticket-setup view
 class TicketSetupView(View):
@@ -886,7 +887,7 @@ class DeleteConfirmView(View):
         
     async def no_button(self, interaction: discord.Interaction):
         logger.info(f"{interaction.user} cancelled deleting ticket in {interaction.channel}")
-        await interaction.message.delete()
+        await scheduler.delete(interaction.message)
 
 class RenameThreadModal(discord.ui.Modal, title="Rename Thread"):
     def __init__(self):